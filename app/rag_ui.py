@@ -94,46 +94,52 @@ def render_document_databank():
     st.markdown("---")
     st.markdown("**Nieuw document toevoegen:**")
 
-    uploaded_file = st.file_uploader(
-        "Kies een PDF",
+    uploaded_files = st.file_uploader(
+        "Kies een of meer PDF's",
         type=["pdf"],
         key="rag_document_upload",
-        help="Upload een beleidsdocument om toe te voegen aan de databank",
+        accept_multiple_files=True,
+        help="Upload beleidsdocumenten om toe te voegen aan de databank",
     )
 
-    if uploaded_file is not None:
-        if st.button("Indexeer document", type="primary"):
+    if uploaded_files:
+        if st.button("Indexeer documenten" if len(uploaded_files) > 1 else "Indexeer document", type="primary"):
             with st.spinner(f"Document indexeren... Dit kan even duren."):
-                # Extract text from PDF - unlimited voor RAG
-                from src.kwaliteitszorg.utils.pdf_processor import extract_text_from_pdf
+                # Extract text from PDFs (parallel) - unlimited voor RAG
+                from src.kwaliteitszorg.utils.pdf_processor import extract_texts_from_pdfs
 
-                result = extract_text_from_pdf(
-                    file_bytes=uploaded_file.read(),
-                    filename=uploaded_file.name,
+                results = extract_texts_from_pdfs(
+                    [(uploaded_file.getbuffer(), uploaded_file.name) for uploaded_file in uploaded_files],
                     unlimited=True,  # Geen limieten voor RAG indexering
                 )
 
-                if not result.success:
-                    st.error(f"PDF extractie mislukt: {result.error}")
-                    return
-
-                # Index the text with page boundaries
-                index_result = retriever.index_text(
-                    text=result.text,
-                    document_name=uploaded_file.name,
-                    page_boundaries=result.page_boundaries,
-                )
-
-                if index_result.success:
-                    st.success(f"Document geïndexeerd: {index_result.chunks_indexed} chunks ({result.char_count:,} karakters, {result.page_count} pagina's)")
+                all_indexed = True
+                for uploaded_file, result in zip(uploaded_files, results):
+                    if not result.success:
+                        st.error(f"PDF extractie mislukt ({uploaded_file.name}): {result.error}")
+                        all_indexed = False
+                        continue
+
+                    # Index the text with page boundaries
+                    index_result = retriever.index_text(
+                        text=result.text,
+                        document_name=uploaded_file.name,
+                        page_boundaries=result.page_boundaries,
+                    )
+
+                    if index_result.success:
+                        st.success(f"{uploaded_file.name} geïndexeerd: {index_result.chunks_indexed} chunks ({result.char_count:,} karakters, {result.page_count} pagina's)")
+                    else:
+                        all_indexed = False
+                        st.error(f"Indexeren mislukt ({uploaded_file.name}): {index_result.error}")
+                        # Toon extra info voor debugging
+                        with st.expander("Details"):
+                            st.write(f"Pagina's verwerkt: {result.page_count}")
+                            st.write(f"Karakters: {result.char_count:,}")
+                            st.write(f"Chunks gemaakt: {index_result.chunks_created}")
+
+                if all_indexed:
                     st.rerun()
-                else:
-                    st.error(f"Indexeren mislukt: {index_result.error}")
-                    # Toon extra info voor debugging
-                    with st.expander("Details"):
-                        st.write(f"Pagina's verwerkt: {result.page_count}")
-                        st.write(f"Karakters: {result.char_count:,}")
-                        st.write(f"Chunks gemaakt: {index_result.chunks_created}")
 
 
 def render_rag_toggle(eis_id: str, eis: dict) -> Tuple[bool, Optional[str], List[str]]:
@@ -1201,7 +1201,7 @@ def render_eis_detail_page():
             if st.session_state.document_filename != uploaded_file.name:
                 with st.spinner("Document verwerken..."):
                     result = extract_text_from_pdf(
-                        file_bytes=uploaded_file.read(),
+                        file_bytes=uploaded_file.getbuffer(),
                         filename=uploaded_file.name,
                     )
 
@@ -56,6 +56,8 @@ DEBUG = os.getenv("KWALITEITSZORG_DEBUG", "false").lower() == "true"
 
 # Ollama
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+# Hoe lang Ollama het model (en de KV cache van de prompt) geladen houdt na een request
+OLLAMA_KEEP_ALIVE = os.getenv("KWALITEITSZORG_KEEP_ALIVE", "10m")
 
 # Model
 MODEL_NAME = os.getenv("KWALITEITSZORG_MODEL", "gemma3:27b")
@@ -72,6 +74,7 @@ REPEAT_PENALTY = 1.1
 
 # Chat
 MAX_CONVERSATION_HISTORY = 10  # Aantal bericht-paren (user + assistant)
+SYSTEM_MESSAGE_CACHE_SIZE = 8  # Aantal gerenderde system messages per assistent
 
 # Input limieten
 MAX_INPUT_CHARS = 5000  # Maximum karakters per tekstveld
@@ -80,6 +83,7 @@ MAX_INPUT_CHARS = 5000  # Maximum karakters per tekstveld
 MAX_DOCUMENT_PAGES = 30  # Maximum aantal pagina's uit PDF
 MAX_DOCUMENT_CHARS = 50000  # Maximum karakters uit document (~15-20 pagina's tekst)
 ALLOWED_DOCUMENT_TYPES = ["pdf"]  # Toegestane bestandstypen
+PDF_CACHE_SIZE = 32  # Aantal extractieresultaten in geheugen (0 = uit)
 
 
 # =============================================================================
@@ -4,7 +4,8 @@ Dit is de centrale class voor alle AI-interacties in de Kwaliteitszorg applicati
 Ondersteunt chat met history, document context, en RAG integratie.
 """
 
-from typing import Callable, Dict, List, Optional
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional
 
 import ollama
 
@@ -12,6 +13,7 @@ from config import settings
 from config.settings import logger
 from ..models.school_invulling import SchoolInvulling
 from ..utils.database import DatabaseError, load_database, load_deugdelijkheidseis
+from ..utils.pdf_processor import estimate_token_count
 from .prompts import (
     SYSTEM_PROMPT,
     build_document_context,
@@ -21,6 +23,15 @@ from .prompts import (
     get_task_instruction,
 )
 
+# Generatie opties; settings zijn constanten, dus eenmalig opgebouwd bij import
+_OLLAMA_OPTIONS = {
+    "temperature": settings.TEMPERATURE_DEFAULT,
+    "num_predict": settings.MAX_GENERATE_TOKENS,
+    "top_p": settings.TOP_P,
+    "repeat_penalty": settings.REPEAT_PENALTY,
+    "num_ctx": settings.NUM_CTX,
+}
+
 
 class OllamaConnectionError(Exception):
     """Exception wanneer Ollama niet bereikbaar is."""
@@ -48,7 +59,7 @@ class DeugdelijkheidseisAssistent:
         model: Naam van het Ollama model
         database_path: Pad naar de eisen database
         database: Geladen database dictionary
-        chat_history: Lijst van vorige berichten in de conversatie
+        chat_history: Vorige berichten in de conversatie (begrensde deque)
         document_salt: Unieke salt voor prompt injection preventie
     """
 
@@ -66,10 +77,20 @@ class DeugdelijkheidseisAssistent:
         self.model = model or settings.MODEL_NAME
         self.database_path = database_path or str(settings.DATABASE_PATH)
         self.database = load_database(self.database_path)
-        self.chat_history: List[Dict[str, str]] = []
-        self.standaard_chat_history: List[Dict[str, str]] = []
+        # Begrensd tot de laatste N berichten (user + assistant paren); de
+        # deque laat de oudste berichten in O(1) vallen
+        max_messages = settings.MAX_CONVERSATION_HISTORY * 2
+        self.chat_history: Deque[Dict[str, str]] = deque(maxlen=max_messages)
+        self.standaard_chat_history: Deque[Dict[str, str]] = deque(maxlen=max_messages)
         # Unieke salt per sessie voor document tags (prompt injection preventie)
         self.document_salt = generate_document_salt()
+        # Gerenderde system messages; vervolgberichten met dezelfde context
+        # hergebruiken de string i.p.v. de prompt opnieuw op te bouwen
+        self._system_message_cache: "OrderedDict[tuple, str]" = OrderedDict()
+        # Context en system message van de lopende conversatie; zolang de
+        # context gelijk blijft wordt exact dezelfde system message verstuurd
+        self._conversation_signature: Optional[tuple] = None
+        self._conversation_system_content: Optional[str] = None
 
     def get_deugdelijkheidseis(self, eis_id: str) -> Dict:
         """Haal deugdelijkheidseis op uit database."""
@@ -107,37 +128,62 @@ class DeugdelijkheidseisAssistent:
         """
         # Bouw de system prompt met alle context
         # Bij het eerste bericht sturen we volledige context (incl. voorbeelden/tips).
-        # Bij vervolgberichten laten we deze weg om context window te besparen.
+        # Vervolgberichten met dezelfde context sturen exact dezelfde system
+        # message, zodat Ollama de KV cache van die prefix kan hergebruiken
+        # i.p.v. de hele prompt opnieuw te verwerken, zolang prompt plus
+        # geschiedenis in het context window past (anders kapt Ollama stil af
+        # en is de prefix toch weg). Past het niet, of verandert de context
+        # halverwege, dan laten we tips/voorbeelden weg om context window te besparen.
         is_first_message = len(self.chat_history) == 0
-        system_content = self._build_system_message(
-            eis_id, school_invulling, vraag_type, document_text, document_filename,
-            rag_context, include_voorbeelden=is_first_message,
+        signature = (
+            eis_id, school_invulling, vraag_type, document_text,
+            document_filename, rag_context, self.document_salt,
         )
-
-        # Bouw de messages array
-        messages = [{"role": "system", "content": system_content}]
-
-        # Voeg chatgeschiedenis toe
-        for msg in self.chat_history:
-            messages.append(msg)
-
-        # Voeg huidige vraag toe
-        messages.append({"role": "user", "content": vraag})
+        if not is_first_message and signature == self._conversation_signature:
+            system_content = self._conversation_system_content
+            if not self._fits_context(system_content, vraag):
+                # Vanaf nu de compacte versie; die blijft daarna weer stabiel
+                system_content = self._build_system_message(
+                    eis_id, school_invulling, vraag_type, document_text, document_filename,
+                    rag_context, include_voorbeelden=False,
+                )
+                self._conversation_system_content = system_content
+        else:
+            system_content = self._build_system_message(
+                eis_id, school_invulling, vraag_type, document_text, document_filename,
+                rag_context, include_voorbeelden=is_first_message,
+            )
+            self._conversation_signature = signature
+            self._conversation_system_content = system_content
+
+        # Bouw de messages array: system, chatgeschiedenis, huidige vraag
+        messages = [
+            {"role": "system", "content": system_content},
+            *self.chat_history,
+            {"role": "user", "content": vraag},
+        ]
 
         # Genereer antwoord
         antwoord = self._generate(messages, stream_handler)
 
-        # Sla op in geschiedenis
+        # Sla op in geschiedenis (deque begrenst tot de laatste N berichten)
         self.chat_history.append({"role": "user", "content": vraag})
         self.chat_history.append({"role": "assistant", "content": antwoord})
 
-        # Beperk geschiedenis tot laatste N berichten
-        max_messages = settings.MAX_CONVERSATION_HISTORY * 2  # user + assistant pairs
-        if len(self.chat_history) > max_messages:
-            self.chat_history = self.chat_history[-max_messages:]
-
         return antwoord
 
+    def _fits_context(self, system_content: str, vraag: str) -> bool:
+        """
+        Schat of system message, geschiedenis, vraag en antwoord in NUM_CTX passen.
+
+        Gebruikt dezelfde ruwe schatting als voor documenten
+        (estimate_token_count) en reserveert num_predict tokens voor het
+        antwoord.
+        """
+        prompt_tokens = estimate_token_count(system_content) + estimate_token_count(vraag)
+        prompt_tokens += sum(estimate_token_count(message["content"]) for message in self.chat_history)
+        return prompt_tokens + _OLLAMA_OPTIONS["num_predict"] <= _OLLAMA_OPTIONS["num_ctx"]
+
     def _build_system_message(
         self,
         eis_id: str,
@@ -157,6 +203,16 @@ class DeugdelijkheidseisAssistent:
                 window te besparen. De AI heeft ze al gezien in het eerste bericht
                 en de chat history bevat het eerdere antwoord.
         """
+        # Salt in de key: na reset_chat hoort een nieuwe salt in de tags
+        cache_key = (
+            eis_id, school_invulling, vraag_type, document_text,
+            document_filename, rag_context, include_voorbeelden, self.document_salt,
+        )
+        cached = self._system_message_cache.get(cache_key)
+        if cached is not None:
+            self._system_message_cache.move_to_end(cache_key)
+            return cached
+
         eis = load_deugdelijkheidseis(self.database, eis_id)
 
         # Bepaal welke context beschikbaar is
@@ -220,6 +276,10 @@ INVULLING VAN DE SCHOOL:
             )
             base_message += f"\n\n---\n{document_context}"
 
+        self._system_message_cache[cache_key] = base_message
+        if len(self._system_message_cache) > settings.SYSTEM_MESSAGE_CACHE_SIZE:
+            self._system_message_cache.popitem(last=False)
+
         return base_message
 
     def chat_standaard(
@@ -258,20 +318,17 @@ INVULLING VAN DE SCHOOL:
             rag_context=rag_context,
         )
 
-        messages = [{"role": "system", "content": system_content}]
-        for msg in self.standaard_chat_history:
-            messages.append(msg)
-        messages.append({"role": "user", "content": vraag})
+        messages = [
+            {"role": "system", "content": system_content},
+            *self.standaard_chat_history,
+            {"role": "user", "content": vraag},
+        ]
 
         antwoord = self._generate(messages, stream_handler)
 
         self.standaard_chat_history.append({"role": "user", "content": vraag})
         self.standaard_chat_history.append({"role": "assistant", "content": antwoord})
 
-        max_messages = settings.MAX_CONVERSATION_HISTORY * 2
-        if len(self.standaard_chat_history) > max_messages:
-            self.standaard_chat_history = self.standaard_chat_history[-max_messages:]
-
         return antwoord
 
     def _build_standaard_system_message(
@@ -331,7 +388,7 @@ INVULLING VAN DE SCHOOL:
 
     def reset_standaard_chat(self):
         """Reset de standaard chatgeschiedenis."""
-        self.standaard_chat_history = []
+        self.standaard_chat_history.clear()
 
     def _generate(
         self,
@@ -353,31 +410,31 @@ INVULLING VAN DE SCHOOL:
             ModelNotFoundError: Als het model niet gevonden wordt
             RuntimeError: Bij andere Ollama fouten
         """
-        options = {
-            "temperature": settings.TEMPERATURE_DEFAULT,
-            "num_predict": settings.MAX_GENERATE_TOKENS,
-            "top_p": settings.TOP_P,
-            "repeat_penalty": settings.REPEAT_PENALTY,
-            "num_ctx": settings.NUM_CTX,
-        }
+        options = _OLLAMA_OPTIONS
 
         try:
             if stream_handler:
-                antwoord = ""
+                # Verzamel chunks in een lijst en join eenmalig: += op een
+                # string kan kwadratisch worden bij lange antwoorden
+                parts = []
                 for chunk in ollama.chat(
                     model=self.model,
                     messages=messages,
                     options=options,
                     stream=True,
+                    keep_alive=settings.OLLAMA_KEEP_ALIVE,
                 ):
                     text = chunk.get("message", {}).get("content", "")
                     if text:
-                        antwoord += text
+                        parts.append(text)
                         stream_handler(text)
-                return antwoord
+                return "".join(parts)
             else:
                 response = ollama.chat(
-                    model=self.model, messages=messages, options=options
+                    model=self.model,
+                    messages=messages,
+                    options=options,
+                    keep_alive=settings.OLLAMA_KEEP_ALIVE,
                 )
                 return response["message"]["content"]
 
@@ -401,12 +458,15 @@ INVULLING VAN DE SCHOOL:
 
     def reset_chat(self):
         """Reset de chatgeschiedenis en genereer nieuwe document salt."""
-        self.chat_history = []
+        self.chat_history.clear()
         self.document_salt = generate_document_salt()
+        self._system_message_cache.clear()
+        self._conversation_signature = None
+        self._conversation_system_content = None
 
     def get_chat_history(self) -> List[Dict[str, str]]:
         """Haal de chatgeschiedenis op."""
-        return self.chat_history.copy()
+        return list(self.chat_history)
 
     # Backwards compatibility
     def beantwoord_vraag(self, deugdelijkheidseis_id: str, school_invulling: SchoolInvulling,
@@ -1,6 +1,7 @@
 """System prompt en templates voor de Kwaliteitszorg AI assistent."""
 
 import secrets
+from functools import lru_cache
 
 SYSTEM_PROMPT = """Je bent Kwaliteitszorg AI, een expert-assistent voor Nederlandse scholen die werken aan deugdelijkheidseisen van de Onderwijsinspectie. Je combineert kennis van onderwijskwaliteit met praktische ervaring in schoolbeleid.
 
@@ -295,18 +296,9 @@ Beschrijf per eis:
     return instruction
 
 
-def get_task_instruction(vraag_type: str, has_document: bool = False, has_rag: bool = False) -> str:
-    """
-    Geef taak-specifieke instructie terug.
-
-    Args:
-        vraag_type: Type vraag (feedback/uitleg/suggestie/algemeen)
-        has_document: Of er een enkel beleidsdocument is gekoppeld
-        has_rag: Of er RAG-passages zijn opgehaald uit de documentdatabank
-    """
-
-    if vraag_type == "feedback":
-        instruction = """Geef feedback op de invulling van de school.
+# Taakinstructies per vraagtype, eenmalig opgebouwd bij import
+_TASK_INSTRUCTIONS = {
+    "feedback": """Geef feedback op de invulling van de school.
 
 <instructies>
 1. Begin met een oordeel: Goed / Voldoende / Onvoldoende / Niet te beoordelen
@@ -330,19 +322,15 @@ def get_task_instruction(vraag_type: str, has_document: bool = False, has_rag: b
 **Vervolgstappen:**
 - Vul het veld 'wijze van meten' aan met evaluatiemomenten
 - Voeg aan beoogd resultaat toe wanneer jullie dit willen bereiken
-</voorbeeld_feedback>"""
-
-    elif vraag_type == "uitleg":
-        instruction = """Leg deze deugdelijkheidseis uit.
+</voorbeeld_feedback>""",
+    "uitleg": """Leg deze deugdelijkheidseis uit.
 
 Behandel:
 - Wat houdt de eis in?
 - Waarom is dit belangrijk?
 - Hoe kan een school dit invullen?
-- Geef praktijkvoorbeelden"""
-
-    elif vraag_type == "suggestie":
-        instruction = """Geef concrete suggesties om de invulling te verbeteren.
+- Geef praktijkvoorbeelden""",
+    "suggestie": """Geef concrete suggesties om de invulling te verbeteren.
 
 Zoek naar RELEVANTE informatie in de documenten, ook als die niet letterlijk over de eis gaat.
 Zet relevante informatie om naar concrete acties/doelen voor de invulling.
@@ -351,10 +339,27 @@ VERZIN niets dat niet in de documenten staat.
 Beschrijf per suggestie:
 - Wat de school kan toevoegen (gebaseerd op hun documenten)
 - Waarom dit helpt om aan de eis te voldoen
-- Verwijs naar de bron (document) waar je dit vindt"""
+- Verwijs naar de bron (document) waar je dit vindt""",
+}
 
-    else:  # algemeen
-        instruction = "Beantwoord de vraag op basis van de eisinformatie en schoolinvulling."
+# Instructie voor "algemeen" en onbekende vraagtypes
+_DEFAULT_TASK_INSTRUCTION = "Beantwoord de vraag op basis van de eisinformatie en schoolinvulling."
+
+
+@lru_cache(maxsize=32)
+def get_task_instruction(vraag_type: str, has_document: bool = False, has_rag: bool = False) -> str:
+    """
+    Geef taak-specifieke instructie terug.
+
+    Het resultaat hangt alleen af van de argumenten en wordt gecachet, zodat
+    elke chat-beurt dezelfde string hergebruikt.
+
+    Args:
+        vraag_type: Type vraag (feedback/uitleg/suggestie/algemeen)
+        has_document: Of er een enkel beleidsdocument is gekoppeld
+        has_rag: Of er RAG-passages zijn opgehaald uit de documentdatabank
+    """
+    instruction = _TASK_INSTRUCTIONS.get(vraag_type, _DEFAULT_TASK_INSTRUCTION)
 
     # Voeg context-specifieke instructies toe
     if has_rag:
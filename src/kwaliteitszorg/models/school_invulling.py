@@ -1,11 +1,16 @@
 """SchoolInvulling dataclass voor de invulling van een school."""
 
 from dataclasses import dataclass
+from functools import cached_property
 
 
-@dataclass
+@dataclass(frozen=True)
 class SchoolInvulling:
-    """De invulling van een school voor een deugdelijkheidseis."""
+    """
+    De invulling van een school voor een deugdelijkheidseis.
+
+    Immutable en dus hashable, zodat een invulling als cache key kan dienen.
+    """
 
     ambitie: str = ""
     beoogd_resultaat: str = ""
@@ -22,7 +27,17 @@ class SchoolInvulling:
         ])
 
     def to_text(self) -> str:
-        """Converteer naar leesbare tekst voor in de context."""
+        """
+        Converteer naar leesbare tekst voor in de context.
+
+        De invulling is immutable, dus de tekst wordt eenmalig opgebouwd en
+        bij volgende aanroepen hergebruikt.
+        """
+        return self._text
+
+    @cached_property
+    def _text(self) -> str:
+        """Gecachete tekstweergave (zie to_text)."""
         if self.is_leeg():
             return "[Nog niet ingevuld door de school]"
 
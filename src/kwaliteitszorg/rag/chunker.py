@@ -13,6 +13,28 @@ from typing import List, Optional, Dict, Any
 
 from . import config
 
+# Voorgecompileerde patronen voor het trimmen van overlap op woord-grenzen
+_RE_TRIM_START = re.compile(r'^\S*\s')
+# \Z i.p.v. $ ($ matcht ook vóór een laatste \n); die \n valt, net als het
+# laatste woord, weg: gelijk aan text[:re.search(r'\s(?=[^\s]*$)', text).start()]
+_RE_TRIM_END = re.compile(r'\s\S*\n?\Z')
+
+# Vaste volgorde van de metadata velden voor de vector store
+_META_KEYS = (
+    "chunk_id",
+    "document_id",
+    "document_name",
+    "document_path",
+    "page_number",
+    "chunk_index",
+    "total_chunks",
+    "char_start",
+    "char_end",
+    "section_header",
+    "created_at",
+    "char_count",
+)
+
 
 @dataclass
 class Chunk:
@@ -31,22 +53,26 @@ class Chunk:
     section_header: Optional[str] = None
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
 
+    def to_metadata_tuple(self) -> tuple:
+        """Metadata als tuple in de volgorde van _META_KEYS."""
+        return (
+            self.chunk_id,
+            self.document_id,
+            self.document_name,
+            self.document_path or "",
+            self.page_number or -1,
+            self.chunk_index,
+            self.total_chunks,
+            self.char_start,
+            self.char_end,
+            self.section_header or "",
+            self.created_at,
+            len(self.text),
+        )
+
     def to_metadata_dict(self) -> Dict[str, Any]:
         """Converteer naar dict voor vector store metadata."""
-        return {
-            "chunk_id": self.chunk_id,
-            "document_id": self.document_id,
-            "document_name": self.document_name,
-            "document_path": self.document_path or "",
-            "page_number": self.page_number or -1,
-            "chunk_index": self.chunk_index,
-            "total_chunks": self.total_chunks,
-            "char_start": self.char_start,
-            "char_end": self.char_end,
-            "section_header": self.section_header or "",
-            "created_at": self.created_at,
-            "char_count": len(self.text),
-        }
+        return dict(zip(_META_KEYS, self.to_metadata_tuple()))
 
     def preview(self, length: int = 100) -> str:
         """Geef een preview van de chunk tekst."""
@@ -97,12 +123,15 @@ class DocumentChunker:
         min_size: int = None,
         max_size: int = None,
         overlap_percent: int = None,
+        max_embed_chars: int = None,
         verbose: bool = None,
     ):
         self.target_size = target_size or config.CHUNK_TARGET_SIZE
         self.min_size = min_size or config.CHUNK_MIN_SIZE
         self.max_size = max_size or config.CHUNK_MAX_SIZE
         self.overlap_percent = overlap_percent or config.CHUNK_OVERLAP_PERCENT
+        # Harde limiet per chunk, zodat de embedder nooit hoeft in te korten
+        self.max_embed_chars = max_embed_chars or config.MAX_EMBED_TEXT_LENGTH
         self.verbose = verbose if verbose is not None else config.VERBOSE
         self.overlap_size = int(self.target_size * self.overlap_percent / 100)
 
@@ -230,15 +259,29 @@ class DocumentChunker:
 
             # Finale check: content-aware splitting
             # Zorg dat geen chunk te groot is voor zijn token-complexiteit
-            final_chunks = []
-            for chunk in chunks_with_overlap:
-                adaptive_max = self._get_adaptive_max_size(chunk)
-                if len(chunk) > adaptive_max:
-                    # Split chunk met aangepaste limiet
-                    self._log(f"Chunk te groot ({len(chunk)} > {adaptive_max}), splitting...")
-                    final_chunks.extend(self._force_split_text_adaptive(chunk, adaptive_max))
-                else:
-                    final_chunks.append(chunk)
+            # of voor het embedding model (max_embed_chars).
+            # De adaptieve limiet is nooit kleiner dan split_threshold, dus
+            # kleinere chunks hoeven niet geanalyseerd te worden. Zonder
+            # kandidaten slaan we de hele adaptieve pass over.
+            split_threshold = min(
+                max(int(self.max_size / self.TOKEN_COST_HIGH), self.min_size),
+                self.max_embed_chars,
+            )
+            if not any(len(c) > split_threshold for c in chunks_with_overlap):
+                final_chunks = chunks_with_overlap
+            else:
+                final_chunks = []
+                for chunk in chunks_with_overlap:
+                    if len(chunk) <= split_threshold:
+                        final_chunks.append(chunk)
+                        continue
+                    adaptive_max = min(self._get_adaptive_max_size(chunk), self.max_embed_chars)
+                    if len(chunk) > adaptive_max:
+                        # Split chunk met aangepaste limiet
+                        self._log(f"Chunk te groot ({len(chunk)} > {adaptive_max}), splitting...")
+                        final_chunks.extend(self._force_split_text_adaptive(chunk, adaptive_max))
+                    else:
+                        final_chunks.append(chunk)
 
             # Maak Chunk objecten met metadata
             chunks = self._create_chunk_objects(
@@ -403,37 +446,29 @@ class DocumentChunker:
 
     def _add_overlap(self, chunks: List[str]) -> List[str]:
         """Voeg overlap toe tussen opeenvolgende chunks."""
-        if len(chunks) <= 1 or self.overlap_size <= 0:
+        overlap_size = self.overlap_size
+        if len(chunks) <= 1 or overlap_size <= 0:
             return chunks
 
-        overlapped_chunks = []
+        trim_start = _RE_TRIM_START.sub
+        overlapped_chunks = [chunks[0]]
 
-        for i, chunk in enumerate(chunks):
-            if i == 0:
-                overlapped_chunks.append(chunk)
-            else:
-                prev_chunk = chunks[i - 1]
-                overlap_text = prev_chunk[-self.overlap_size:] if len(prev_chunk) > self.overlap_size else prev_chunk
-                overlap_text = self._trim_to_word_boundary(overlap_text, from_start=True)
+        for prev_chunk, chunk in zip(chunks, chunks[1:]):
+            # Slicing met een negatieve start is veilig ook als prev_chunk korter is
+            overlap_text = trim_start('', prev_chunk[-overlap_size:], count=1)
 
-                if overlap_text:
-                    overlapped_chunks.append(f"[...] {overlap_text}\n\n{chunk}")
-                else:
-                    overlapped_chunks.append(chunk)
+            if overlap_text:
+                overlapped_chunks.append(f"[...] {overlap_text}\n\n{chunk}")
+            else:
+                overlapped_chunks.append(chunk)
 
         return overlapped_chunks
 
     def _trim_to_word_boundary(self, text: str, from_start: bool = True) -> str:
         """Trim tekst naar de dichtstbijzijnde woord-grens."""
         if from_start:
-            match = re.search(r'\s', text)
-            if match:
-                return text[match.end():]
-        else:
-            match = re.search(r'\s(?=[^\s]*$)', text)
-            if match:
-                return text[:match.start()]
-        return text
+            return _RE_TRIM_START.sub('', text, count=1)
+        return _RE_TRIM_END.sub('', text, count=1)
 
     def _find_page_for_position(
         self,
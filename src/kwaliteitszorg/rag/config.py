@@ -4,6 +4,7 @@ Configuratie voor de RAG module.
 Alle RAG-specifieke instellingen staan hier.
 """
 
+import os
 from pathlib import Path
 
 from config import settings
@@ -61,6 +62,34 @@ PARAGRAPH_SEPARATOR = "\n\n"
 # We gebruiken een veilige marge
 MAX_EMBED_TEXT_LENGTH = 24000  # ~6000 tokens
 
+# Aantal gelijktijdige embedding requests naar Ollama bij batch embedding.
+# Ollama verwerkt requests alleen echt parallel als de server gestart is met
+# OLLAMA_NUM_PARALLEL >= deze waarde (bijv. OLLAMA_NUM_PARALLEL=4 ollama serve).
+EMBED_CONCURRENCY = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+
+# Aantal teksten per request naar Ollama's batch embed endpoint (/api/embed)
+EMBED_BATCH_SIZE = 32
+
+# Aantal chunks dat per keer ge-embed en opgeslagen wordt bij indexeren.
+# Zo passen alle gelijktijdige batches in een window, maar hoeven niet alle
+# embeddings van een groot document tegelijk in het geheugen te staan.
+INDEX_WINDOW_SIZE = EMBED_BATCH_SIZE * EMBED_CONCURRENCY
+
+# Persistente cache van embeddings (sleutel: hash van model + tekst).
+# Voorkomt dat dezelfde tekst opnieuw ge-embed wordt bij her-indexeren.
+EMBED_CACHE_ENABLED = True
+EMBED_CACHE_PATH = RAG_DATA_DIR / "embedding_cache.sqlite"
+# Maximum aantal embeddings in de cache; daarboven worden de oudste entries
+# verwijderd (ook queries komen in de cache, dus zonder limiet groeit hij altijd)
+EMBED_CACHE_MAX_ROWS = 100_000
+
+# Bekende embedding dimensies per (Ollama URL, model), zodat niet bij elke
+# start een test-embedding nodig is
+EMBEDDER_INFO_PATH = RAG_DATA_DIR / "embedder_info.json"
+
+# Hoe lang (seconden) een positieve model-beschikbaarheidscheck geldig blijft
+MODEL_AVAILABILITY_TTL = 60
+
 # =============================================================================
 # Retrieval Parameters
 # =============================================================================
@@ -74,6 +103,14 @@ MIN_SIMILARITY_THRESHOLD = 0.3
 # Maximum karakters voor context in LLM prompt
 MAX_CONTEXT_CHARS = 8000
 
+# Semantische query cache: hergebruik resultaten van (bijna) identieke queries
+SEMANTIC_CACHE_ENABLED = True
+SEMANTIC_CACHE_THRESHOLD = 0.97  # Minimum cosine similarity voor een cache hit
+SEMANTIC_CACHE_CAPACITY = 1024   # Maximum aantal gecachete queries
+
+# Aantal geformatteerde LLM contexten dat per retriever bewaard wordt
+CONTEXT_CACHE_SIZE = 256
+
 # =============================================================================
 # Vector Store
 # =============================================================================
@@ -81,6 +118,11 @@ MAX_CONTEXT_CHARS = 8000
 # Collectie naam voor schooldocumenten
 COLLECTION_NAME = "kwaliteitszorg_documenten"
 
+# Dtype van het embeddings bestand op disk. In het geheugen wordt altijd met
+# float32 gerekend; "float16" halveert de bestandsgrootte en leestijd ten
+# koste van ~3 significante cijfers precisie (ruim genoeg voor ranking).
+EMBEDDING_STORAGE_DTYPE = "float32"
+
 # =============================================================================
 # Logging
 # =============================================================================
@@ -4,40 +4,217 @@ Ollama Embedder voor RAG.
 Genereert embeddings via lokale Ollama installatie.
 """
 
+import asyncio
+import hashlib
+import json
+import math
+import sqlite3
+import threading
 import time
-from dataclasses import dataclass
-from typing import List, Optional, Dict
+from dataclasses import dataclass, field
+from operator import attrgetter
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
 import ollama
 
 from . import config
 
+# Optioneel: SimSIMD voor SIMD-versnelde (AVX2/AVX-512/NEON) cosine similarity
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
 
-@dataclass
+# Proces-brede caches, gedeeld door alle OllamaEmbedder instanties.
+# Sleutel: (base_url, model)
+_DIM_CACHE: Dict[Tuple[str, str], int] = {}
+_AVAIL_CACHE: Dict[Tuple[str, str], Tuple[bool, str, float]] = {}
+
+# Eén achtergrond event loop voor alle embedders (in plaats van een thread
+# per embedder, die per sessie zou lekken), met één AsyncClient per base_url
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+_ASYNC_CLIENTS: Dict[str, "ollama.AsyncClient"] = {}
+
+# Eén EmbeddingCache (SQLite verbinding en rijtelling) per bestand, gedeeld
+# door alle embedders. Sleutel: opgelost pad
+_CACHES: Dict[str, "EmbeddingCache"] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+@dataclass(slots=True)
 class EmbeddingResult:
     """Resultaat van een embedding operatie."""
 
     success: bool
-    embedding: Optional[List[float]] = None
-    text_preview: str = ""
+    embedding: Optional[np.ndarray] = None  # shape (D,), float32
     dimensions: int = 0
     processing_time_ms: float = 0.0
     error: Optional[str] = None
+    _text_head: str = ""  # Eerste 50 karakters van de tekst
+    _truncated: bool = False  # Of de tekst langer was dan _text_head
 
+    @property
+    def text_preview(self) -> str:
+        """Korte preview van de ge-embedde tekst."""
+        return self._text_head + "..." if self._truncated else self._text_head
 
-@dataclass
+
+@dataclass(slots=True)
 class BatchEmbeddingResult:
     """Resultaat van een batch embedding operatie."""
 
     success: bool
-    embeddings: List[List[float]]
+    embeddings: np.ndarray  # shape (N, D), float32; mislukte rijen zijn nullen
     total_texts: int = 0
     successful_count: int = 0
     failed_count: int = 0
     total_time_ms: float = 0.0
     avg_time_per_text_ms: float = 0.0
     dimensions: int = 0
-    errors: List[str] = None
+    errors: List[str] = field(default_factory=list)
+    success_mask: Optional[np.ndarray] = None  # shape (N,), True = gelukt
+
+
+class EmbeddingCache:
+    """
+    Persistente, content-addressed cache voor embeddings.
+
+    Embeddings worden opgeslagen in SQLite, met als sleutel de SHA-256 hash
+    van endpoint + model + tekst. Een ander model geeft dus automatisch andere
+    sleutels, zodat wisselen van model geen verkeerde embeddings oplevert.
+    Het endpoint zit in de sleutel omdat /api/embed genormaliseerde vectoren
+    teruggeeft en het oude /api/embeddings niet.
+
+    De cache is een optimalisatie: SQLite fouten (database locked door een
+    ander proces, disk vol) worden gelogd en behandeld als een miss of een
+    overgeslagen put. Boven max_rows worden de oudst geschreven entries
+    verwijderd.
+    """
+
+    def __init__(self, path: Path = None, max_rows: int = None, verbose: bool = None):
+        self.path = Path(path or config.EMBED_CACHE_PATH)
+        self.max_rows = max_rows or config.EMBED_CACHE_MAX_ROWS
+        self.verbose = verbose if verbose is not None else config.VERBOSE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "hash BLOB PRIMARY KEY, model TEXT, dim INTEGER, vec BLOB)"
+            )
+            self._conn.commit()
+            # Schatting van het aantal rijen; alleen bij overschrijden van
+            # max_rows wordt er echt geteld (andere processen schrijven ook)
+            self._approx_rows = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _log(self, message: str):
+        """Print log message als verbose aan staat."""
+        if self.verbose:
+            print(f"[EmbeddingCache] {message}")
+
+    @staticmethod
+    def make_key(model: str, text: str, endpoint: str = "embed") -> bytes:
+        """
+        Bereken de cache sleutel voor een endpoint + model + tekst combinatie.
+
+        Args:
+            endpoint: "embed" (batch, genormaliseerd) of "embeddings" (los, ruw)
+        """
+        return hashlib.sha256(f"{endpoint}\0{model}\0{text}".encode("utf-8")).digest()
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """Haal een embedding op, of None als deze niet in de cache staat."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Haal meerdere embeddings in een keer op (alleen de hits)."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        try:
+            with self._lock:
+                # SQLite heeft een limiet op het aantal parameters per query
+                for start in range(0, len(unique_keys), 500):
+                    batch = unique_keys[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        f"SELECT hash, vec FROM embeddings WHERE hash IN ({placeholders})",
+                        batch,
+                    ).fetchall()
+                    for key, vec in rows:
+                        found[bytes(key)] = np.frombuffer(vec, dtype=np.float32)
+        except sqlite3.Error as e:
+            # Behandel als miss: de embeddings worden gewoon opnieuw berekend
+            self._log(f"Lezen uit cache mislukt: {e}")
+            return {}
+        return found
+
+    def put(self, key: bytes, model: str, embedding: List[float]):
+        """Sla een embedding op."""
+        self.put_many([(key, model, embedding)])
+
+    def put_many(self, items: List[tuple]):
+        """Sla meerdere (key, model, embedding) tuples op."""
+        rows = []
+        for key, model, embedding in items:
+            vec = np.asarray(embedding, dtype=np.float32)
+            rows.append((key, model, int(vec.shape[0]), vec.tobytes()))
+        if not rows:
+            return
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (hash, model, dim, vec) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.commit()
+                self._approx_rows += len(rows)
+                if self._approx_rows > self.max_rows:
+                    self._evict()
+        except sqlite3.Error as e:
+            # Put overslaan: het resultaat is er al, alleen niet gecachet
+            self._log(f"Schrijven naar cache mislukt: {e}")
+            try:
+                self._conn.rollback()
+            except sqlite3.Error:
+                pass
+
+    def _evict(self):
+        """Verwijder de oudst geschreven entries tot onder max_rows (lock vereist)."""
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        # Ruim 10% extra op, zodat niet bij elke put opnieuw geteld wordt
+        excess = count - int(self.max_rows * 0.9)
+        if count > self.max_rows and excess > 0:
+            # INSERT OR REPLACE geeft een nieuwe rowid: laagste rowid = oudst geschreven
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY rowid LIMIT ?)",
+                (excess,),
+            )
+            self._conn.commit()
+            self._log(f"{excess} oude embeddings verwijderd")
+            count -= excess
+        self._approx_rows = count
+
+
+def _get_shared_cache(path: Path) -> EmbeddingCache:
+    """
+    Haal de gedeelde EmbeddingCache voor `path` op (lazy aangemaakt).
+
+    Elke Streamlit sessie maakt een eigen embedder; zo openen ze niet elk
+    een eigen SQLite verbinding en tellen ze niet elk de hele tabel bij
+    het opstarten. EmbeddingCache is zelf thread-safe.
+    """
+    key = str(Path(path).resolve())
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = _CACHES[key] = EmbeddingCache(path=path)
+        return cache
 
 
 class OllamaEmbedder:
@@ -53,32 +230,53 @@ class OllamaEmbedder:
         model: str = None,
         base_url: str = None,
         verbose: bool = None,
+        cache: Optional[EmbeddingCache] = None,
     ):
         self.model = model or config.ACTIVE_EMBEDDING_MODEL
         self.base_url = base_url or config.OLLAMA_BASE_URL
         self.verbose = verbose if verbose is not None else config.VERBOSE
         self._dimensions: Optional[int] = None
 
+        # Eén client per embedder, zodat HTTP verbindingen warm blijven.
+        # De async client en de gedeelde event loop worden pas bij de eerste
+        # batch aangemaakt.
+        self._client = ollama.Client(host=self.base_url)
+
+        if cache is None and config.EMBED_CACHE_ENABLED:
+            try:
+                cache = _get_shared_cache(config.EMBED_CACHE_PATH)
+            except Exception as e:
+                self._log(f"Embedding cache niet beschikbaar: {e}")
+        self.cache = cache
+
     def _log(self, message: str):
         """Print log message als verbose aan staat."""
         if self.verbose:
             print(f"[Embedder] {message}")
 
+    @property
+    def _cache_key(self) -> Tuple[str, str]:
+        return (self.base_url, self.model)
+
     def check_model_available(self) -> tuple[bool, str]:
         """
         Check of het embedding model beschikbaar is.
 
+        Een positief resultaat wordt config.MODEL_AVAILABILITY_TTL seconden
+        onthouden, zodat herhaalde check_setup() aanroepen geen Ollama
+        request kosten. Negatieve resultaten worden niet gecachet, zodat
+        een net geïnstalleerd model direct gevonden wordt.
+
         Returns:
             Tuple van (is_available, message)
         """
-        try:
-            response = ollama.list()
+        cached = _AVAIL_CACHE.get(self._cache_key)
+        if cached and time.monotonic() - cached[2] < config.MODEL_AVAILABILITY_TTL:
+            return cached[0], cached[1]
 
-            model_names = []
-            if hasattr(response, 'models'):
-                model_names = [m.model for m in response.models if hasattr(m, 'model')]
-            elif isinstance(response, dict) and 'models' in response:
-                model_names = [m.get("name", "") for m in response.get("models", [])]
+        try:
+            response = self._client.list()
+            model_names = self._extract_model_names(response)
 
             model_base = self.model.split(":")[0]
             available = any(
@@ -87,7 +285,9 @@ class OllamaEmbedder:
             )
 
             if available:
-                return True, f"Model '{self.model}' is beschikbaar"
+                message = f"Model '{self.model}' is beschikbaar"
+                _AVAIL_CACHE[self._cache_key] = (True, message, time.monotonic())
+                return True, message
             else:
                 return False, (
                     f"Model '{self.model}' niet gevonden. "
@@ -98,17 +298,127 @@ class OllamaEmbedder:
             return False, f"Kan geen verbinding maken met Ollama: {str(e)}"
 
     def get_embedding_dimensions(self) -> int:
-        """Haal het aantal dimensies van het embedding model op."""
+        """
+        Haal het aantal dimensies van het embedding model op.
+
+        Zoekt eerst in de proces-brede cache, dan in het bestand
+        config.EMBEDDER_INFO_PATH, en doet pas als laatste een
+        test-embedding via Ollama.
+        """
         if self._dimensions:
             return self._dimensions
 
+        dimensions = _DIM_CACHE.get(self._cache_key) or self._read_dimensions_file()
+        if dimensions:
+            _DIM_CACHE[self._cache_key] = dimensions
+            self._dimensions = dimensions
+            return dimensions
+
+        # Alleen als er nog nooit iets ge-embed is: doe een test-embedding
         result = self.embed_text("test")
         if result.success:
-            self._dimensions = result.dimensions
-            return self._dimensions
+            return result.dimensions
 
         return 0
 
+    def _remember_dimensions(self, dimensions: int):
+        """
+        Onthoud de dimensie van een echte embedding response.
+
+        Zo is get_embedding_dimensions() na de eerste embed gratis en is
+        er nooit een aparte test-embedding nodig.
+        """
+        if not dimensions or self._dimensions == dimensions:
+            return
+        self._dimensions = dimensions
+        if _DIM_CACHE.get(self._cache_key) != dimensions:
+            _DIM_CACHE[self._cache_key] = dimensions
+            self._write_dimensions_file(dimensions)
+
+    def _read_dimensions_file(self) -> int:
+        """Lees de bekende dimensie voor dit model uit het info bestand."""
+        try:
+            with open(config.EMBEDDER_INFO_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return int(data.get("dimensions", {}).get(f"{self.base_url}|{self.model}", 0))
+        except (OSError, ValueError):
+            return 0
+
+    def _write_dimensions_file(self, dimensions: int):
+        """Sla de dimensie voor dit model op in het info bestand."""
+        path = Path(config.EMBEDDER_INFO_PATH)
+        try:
+            data = {}
+            if path.exists():
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            data.setdefault("dimensions", {})[f"{self.base_url}|{self.model}"] = dimensions
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        except (OSError, ValueError) as e:
+            self._log(f"Kon embedder info niet opslaan: {e}")
+
+    def _truncate(self, text: str) -> str:
+        """
+        Kort tekst in als deze te lang is voor het embedding model.
+
+        Chunks van de DocumentChunker zijn al begrensd op max_embed_chars;
+        dit is alleen een vangnet voor losse teksten (bijv. queries).
+        """
+        if len(text) > config.MAX_EMBED_TEXT_LENGTH:
+            original_length = len(text)
+            text = text[:config.MAX_EMBED_TEXT_LENGTH]
+            self._log(f"Tekst ingekort van {original_length} naar {len(text)} karakters")
+        return text
+
+    def _extract_embedding(self, response) -> List[float]:
+        """
+        Haal de embedding uit een Ollama response (object of dict).
+
+        De vorm van de response ligt vast per ollama library versie. Bij de
+        eerste response wordt de vorm gedetecteerd en vervangt een
+        gespecialiseerde extractor deze methode op de instantie, zodat
+        volgende aanroepen geen hasattr/isinstance checks meer doen.
+        """
+        if hasattr(response, 'embedding'):
+            extract = attrgetter('embedding')
+        elif isinstance(response, dict):
+            def extract(r):
+                return r.get("embedding", [])
+        else:
+            return []
+
+        self._extract_embedding = extract
+        return extract(response)
+
+    def _extract_model_names(self, response) -> List[str]:
+        """
+        Haal de modelnamen uit een ollama.list() response (object of dict).
+
+        Specialiseert zichzelf op dezelfde manier als _extract_embedding.
+        """
+        if hasattr(response, 'models'):
+            def extract(r):
+                return [m.model for m in r.models if hasattr(m, 'model')]
+        elif isinstance(response, dict) and 'models' in response:
+            def extract(r):
+                return [m.get("name", "") for m in r.get("models", [])]
+        else:
+            return []
+
+        self._extract_model_names = extract
+        return extract(response)
+
+    @staticmethod
+    def _format_error(error: Exception, text: str) -> str:
+        """Maak een Ollama foutmelding informatiever."""
+        error_msg = str(error)
+        if "connection" in error_msg.lower():
+            error_msg = f"Ollama verbinding verloren: {error_msg}"
+        elif "timeout" in error_msg.lower():
+            error_msg = f"Timeout bij embedding (tekst: {len(text)} chars): {error_msg}"
+        return error_msg
+
     def embed_text(self, text: str) -> EmbeddingResult:
         """
         Genereer een embedding voor een enkele tekst.
@@ -119,53 +429,166 @@ class OllamaEmbedder:
         Returns:
             EmbeddingResult met de embedding en metadata
         """
-        start_time = time.time()
-        preview = text[:50] + "..." if len(text) > 50 else text
+        t0 = time.perf_counter_ns()
+        text_head = text[:50]
+        preview_truncated = len(text) > 50
 
         # Truncate tekst als deze te lang is voor het embedding model
-        original_length = len(text)
-        if len(text) > config.MAX_EMBED_TEXT_LENGTH:
-            text = text[:config.MAX_EMBED_TEXT_LENGTH]
-            self._log(f"Tekst ingekort van {original_length} naar {len(text)} karakters")
+        text = self._truncate(text)
+
+        # Eigen sleutelruimte: /api/embeddings geeft niet-genormaliseerde vectoren
+        cache_key = self.cache.make_key(self.model, text, "embeddings") if self.cache else None
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._remember_dimensions(len(cached))
+                return EmbeddingResult(
+                    success=True,
+                    embedding=cached,
+                    _text_head=text_head,
+                    _truncated=preview_truncated,
+                    dimensions=len(cached),
+                    processing_time_ms=(time.perf_counter_ns() - t0) / 1e6,
+                )
 
         try:
-            response = ollama.embeddings(
+            response = self._client.embeddings(
                 model=self.model,
                 prompt=text,
             )
 
-            if hasattr(response, 'embedding'):
-                embedding = response.embedding
-            elif isinstance(response, dict):
-                embedding = response.get("embedding", [])
-            else:
-                embedding = []
+            embedding = np.asarray(self._extract_embedding(response), dtype=np.float32)
+            processing_time = (time.perf_counter_ns() - t0) / 1e6
 
-            processing_time = (time.time() - start_time) * 1000
+            if cache_key is not None and embedding.size:
+                self.cache.put(cache_key, self.model, embedding)
+            self._remember_dimensions(embedding.size)
 
             return EmbeddingResult(
                 success=True,
                 embedding=embedding,
-                text_preview=preview,
-                dimensions=len(embedding),
+                _text_head=text_head,
+                _truncated=preview_truncated,
+                dimensions=embedding.size,
                 processing_time_ms=processing_time,
             )
 
         except Exception as e:
-            processing_time = (time.time() - start_time) * 1000
-            error_msg = str(e)
-            # Maak de foutmelding informatiever
-            if "connection" in error_msg.lower():
-                error_msg = f"Ollama verbinding verloren: {error_msg}"
-            elif "timeout" in error_msg.lower():
-                error_msg = f"Timeout bij embedding (tekst: {len(text)} chars): {error_msg}"
+            processing_time = (time.perf_counter_ns() - t0) / 1e6
             return EmbeddingResult(
                 success=False,
-                text_preview=preview,
+                _text_head=text_head,
+                _truncated=preview_truncated,
                 processing_time_ms=processing_time,
-                error=error_msg,
+                error=self._format_error(e, text),
             )
 
+    async def _embed_all_async(
+        self,
+        texts: List[str],
+        show_progress: bool,
+        t0: int,
+    ) -> list:
+        """
+        Embed alle teksten via het batch endpoint van de async Ollama client.
+
+        De teksten worden in slices van config.EMBED_BATCH_SIZE naar
+        Ollama's /api/embed gestuurd; het aantal slices dat tegelijk
+        openstaat wordt begrensd door config.EMBED_CONCURRENCY. Als een
+        slice faalt, wordt die slice per tekst opnieuw geprobeerd zodat
+        fouten per tekst gerapporteerd kunnen worden.
+
+        Returns:
+            Per tekst de embedding of de exception, in dezelfde volgorde
+            als de input.
+        """
+        client = self._get_async_client()
+        semaphore = asyncio.Semaphore(config.EMBED_CONCURRENCY)
+        batch_size = config.EMBED_BATCH_SIZE
+        results: list = [None] * len(texts)
+        completed = 0
+        perf_counter_ns = time.perf_counter_ns
+
+        async def _embed_slice(start: int):
+            nonlocal completed
+            batch = texts[start:start + batch_size]
+            async with semaphore:
+                try:
+                    response = await client.embed(model=self.model, input=batch)
+                    vectors = response["embeddings"]
+                    if len(vectors) != len(batch):
+                        raise ValueError(
+                            f"Ollama gaf {len(vectors)} embeddings voor {len(batch)} teksten"
+                        )
+                    results[start:start + len(batch)] = vectors
+                except Exception as e:
+                    self._log(f"Batch embedding mislukt ({e}), per tekst opnieuw proberen")
+                    for offset, text in enumerate(batch):
+                        try:
+                            response = await client.embeddings(model=self.model, prompt=text)
+                            # /api/embeddings normaliseert niet; maak het gelijk
+                            # aan /api/embed, zodat cache en resultaat consistent zijn
+                            vector = np.asarray(self._extract_embedding(response), dtype=np.float32)
+                            norm = np.linalg.norm(vector)
+                            results[start + offset] = vector / norm if norm else vector
+                        except Exception as text_error:
+                            results[start + offset] = text_error
+
+            completed += len(batch)
+            if show_progress:
+                elapsed = (perf_counter_ns() - t0) / 1e6
+                print(f"  Voortgang: {completed}/{len(texts)} ({elapsed:.0f}ms)")
+
+        await asyncio.gather(
+            *[_embed_slice(start) for start in range(0, len(texts), batch_size)]
+        )
+        return results
+
+    @staticmethod
+    def _get_event_loop() -> asyncio.AbstractEventLoop:
+        """
+        Haal de proces-brede achtergrond event loop op (lazy).
+
+        De loop draait in één daemon thread die gedeeld wordt door alle
+        embedders. Daardoor kunnen de AsyncClients (en hun keep-alive
+        verbindingen) hergebruikt worden tussen batches en sessies; een
+        client is gebonden aan de loop waarin hij verbindingen opent.
+        """
+        global _LOOP
+        with _LOOP_LOCK:
+            if _LOOP is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name="ollama-embedder-loop",
+                    daemon=True,
+                )
+                thread.start()
+                _LOOP = loop
+            return _LOOP
+
+    def _get_async_client(self) -> ollama.AsyncClient:
+        """
+        Haal de AsyncClient voor deze base_url op.
+
+        Wordt alleen binnen de achtergrond loop aangeroepen (één thread),
+        dus de dict heeft geen lock nodig.
+        """
+        client = _ASYNC_CLIENTS.get(self.base_url)
+        if client is None:
+            client = _ASYNC_CLIENTS[self.base_url] = ollama.AsyncClient(host=self.base_url)
+        return client
+
+    def _run_async(self, coroutine):
+        """
+        Voer een coroutine synchroon uit op de achtergrond event loop.
+
+        Werkt ook als de aanroeper zelf al in een event loop draait
+        (bijv. binnen een async web handler).
+        """
+        loop = self._get_event_loop()
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
     def embed_batch(
         self,
         texts: List[str],
@@ -174,6 +597,10 @@ class OllamaEmbedder:
         """
         Genereer embeddings voor meerdere teksten.
 
+        De teksten worden in batches naar Ollama's batch embed endpoint
+        gestuurd, met meerdere batches tegelijk (zie config.EMBED_BATCH_SIZE
+        en config.EMBED_CONCURRENCY).
+
         Args:
             texts: Lijst van teksten om te embedden
             show_progress: Toon voortgang tijdens verwerking
@@ -181,33 +608,91 @@ class OllamaEmbedder:
         Returns:
             BatchEmbeddingResult met alle embeddings en statistieken
         """
-        start_time = time.time()
-        embeddings = []
+        t0 = time.perf_counter_ns()
         errors = []
-        successful = 0
-        failed = 0
-        dimensions = 0
 
         self._log(f"Start batch embedding: {len(texts)} teksten")
 
-        for i, text in enumerate(texts):
-            if show_progress and (i + 1) % 5 == 0:
-                elapsed = (time.time() - start_time) * 1000
-                print(f"  Voortgang: {i + 1}/{len(texts)} ({elapsed:.0f}ms)")
-
-            result = self.embed_text(text)
+        # Hot loop micro-optimalisatie: attributen één keer aan locals binden
+        model = self.model
+        max_length = config.MAX_EMBED_TEXT_LENGTH
+        truncate = self._truncate
+
+        # Alleen te lange teksten gaan via _truncate (die ook logt)
+        truncated_texts = [
+            text if len(text) <= max_length else truncate(text)
+            for text in texts
+        ]
+
+        # Dubbele teksten (kop- en voetteksten, boilerplate) maar één keer
+        # embedden; positions wijst elke tekst naar zijn unieke index
+        unique_index: Dict[str, int] = {}
+        positions = [unique_index.setdefault(text, len(unique_index)) for text in truncated_texts]
+        unique_texts = list(unique_index)
+        if len(unique_texts) < len(truncated_texts):
+            self._log(f"Duplicaten: {len(truncated_texts) - len(unique_texts)} teksten overgeslagen")
+
+        unique_results: list = [None] * len(unique_texts)
+
+        # Haal eerder berekende embeddings uit de cache
+        cache_keys = []
+        if self.cache:
+            make_key = self.cache.make_key
+            cache_keys = [make_key(model, text, "embed") for text in unique_texts]
+            cached = self.cache.get_many(cache_keys)
+            for i, key in enumerate(cache_keys):
+                unique_results[i] = cached.get(key)
+
+        # Embed alleen de teksten die niet in de cache staan
+        miss_indices = [i for i, result in enumerate(unique_results) if result is None]
+        if miss_indices:
+            if len(miss_indices) < len(unique_texts):
+                self._log(f"Cache: {len(unique_texts) - len(miss_indices)} hits, {len(miss_indices)} misses")
+            miss_results = self._run_async(
+                self._embed_all_async(
+                    [unique_texts[i] for i in miss_indices],
+                    show_progress,
+                    t0,
+                )
+            )
+            for i, result in zip(miss_indices, miss_results):
+                unique_results[i] = result
+
+            if self.cache:
+                self.cache.put_many([
+                    (cache_keys[i], model, unique_results[i])
+                    for i in miss_indices
+                    if not isinstance(unique_results[i], Exception) and len(unique_results[i])
+                ])
+
+        # Schrijf alle embeddings in een aaneengesloten (N, D) float32 array
+        dimensions = next(
+            (len(r) for r in unique_results if not isinstance(r, Exception) and len(r)),
+            0,
+        )
+        self._remember_dimensions(dimensions)
+        embeddings = np.zeros((len(texts), dimensions), dtype=np.float32)
+        success_mask = np.zeros(len(texts), dtype=bool)
+        results = [unique_results[position] for position in positions]
+
+        errors_append = errors.append
+        format_error = self._format_error
+        for i, (text, result) in enumerate(zip(truncated_texts, results)):
+            if isinstance(result, Exception):
+                errors_append(f"Text {i}: {format_error(result, text)}")
+                continue
+            if len(result) != dimensions:
+                errors_append(
+                    f"Text {i}: Onverwachte embedding dimensie ({len(result)} i.p.v. {dimensions})"
+                )
+                continue
 
-            if result.success:
-                embeddings.append(result.embedding)
-                successful += 1
-                if dimensions == 0:
-                    dimensions = result.dimensions
-            else:
-                embeddings.append([])
-                errors.append(f"Text {i}: {result.error}")
-                failed += 1
+            embeddings[i] = result
+            success_mask[i] = True
 
-        total_time = (time.time() - start_time) * 1000
+        successful = int(success_mask.sum())
+        failed = len(texts) - successful
+        total_time = (time.perf_counter_ns() - t0) / 1e6
 
         return BatchEmbeddingResult(
             success=failed == 0,
@@ -218,28 +703,119 @@ class OllamaEmbedder:
             total_time_ms=total_time,
             avg_time_per_text_ms=total_time / len(texts) if texts else 0,
             dimensions=dimensions,
-            errors=errors if errors else None,
+            errors=errors,
+            success_mask=success_mask,
         )
 
+    def embed_batch_iter(
+        self,
+        texts: List[str],
+        window_size: int = None,
+        show_progress: bool = False,
+    ) -> Iterator[Tuple[int, BatchEmbeddingResult]]:
+        """
+        Embed teksten per window en geef elk window direct terug.
+
+        Er staat steeds maar één window aan embeddings tegelijk in het
+        geheugen: VectorStore.add_chunks_streaming normaliseert elk (n, D)
+        float32 window direct in gereserveerde rijen van zijn buffer, waarna
+        het window vrijgegeven kan worden. De aanroeper kan stoppen zodra
+        een window mislukt.
+
+        Args:
+            texts: Lijst van teksten om te embedden
+            window_size: Aantal teksten per window (default: config.INDEX_WINDOW_SIZE)
+            show_progress: Toon voortgang tijdens verwerking
+
+        Yields:
+            (start index van het window, BatchEmbeddingResult van het window)
+        """
+        window_size = window_size or config.INDEX_WINDOW_SIZE
+
+        for start in range(0, len(texts), window_size):
+            window = texts[start:start + window_size]
+            if show_progress:
+                print(f"  Window {start // window_size + 1}: teksten {start + 1}-{start + len(window)} van {len(texts)}")
+            yield start, self.embed_batch(window, show_progress=show_progress)
+
     def compute_similarity(
         self,
-        embedding1: List[float],
-        embedding2: List[float],
+        embedding1: np.ndarray,
+        embedding2: np.ndarray,
     ) -> float:
         """
         Bereken cosine similarity tussen twee embeddings.
 
+        Gebruikt SimSIMD als dat geïnstalleerd is, anders NumPy.
+
         Returns:
             Similarity score tussen 0 en 1
         """
-        if not embedding1 or not embedding2:
+        if embedding1 is None or embedding2 is None:
             return 0.0
 
-        dot_product = sum(a * b for a, b in zip(embedding1, embedding2))
-        norm1 = sum(a * a for a in embedding1) ** 0.5
-        norm2 = sum(b * b for b in embedding2) ** 0.5
+        a = np.asarray(embedding1, dtype=np.float32)
+        b = np.asarray(embedding2, dtype=np.float32)
+        if a.size == 0 or b.size == 0:
+            return 0.0
 
-        if norm1 == 0 or norm2 == 0:
+        # Gekwadrateerde normen; de wortel pas trekken als beide nonzero zijn
+        squared_norm1 = float(a @ a)
+        if squared_norm1 == 0:
             return 0.0
+        squared_norm2 = float(b @ b)
+        if squared_norm2 == 0:
+            return 0.0
+
+        if simsimd is not None:
+            # SimSIMD geeft de cosine *afstand* terug
+            return 1.0 - float(simsimd.cosine(a, b))
 
-        return dot_product / (norm1 * norm2)
+        # Eén sqrt van het product in plaats van twee losse normen
+        return float(a @ b) / math.sqrt(squared_norm1 * squared_norm2)
+
+    def compute_similarity_batch(
+        self,
+        query: np.ndarray,
+        matrix: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Bereken cosine similarity tussen één query en een matrix van embeddings.
+
+        Bedoeld voor o.a. reranking van kandidaten: één matrix-vector product
+        in plaats van een Python loop over compute_similarity. Als de
+        embeddings al genormaliseerd zijn, is dit gelijk aan `matrix @ query`.
+
+        Args:
+            query: Query embedding, shape (D,)
+            matrix: Kandidaat embeddings, shape (N, D)
+
+        Returns:
+            Array met N similarity scores (0.0 voor nul-vectoren)
+        """
+        if query is None or matrix is None:
+            return np.zeros(0, dtype=np.float32)
+
+        q = np.asarray(query, dtype=np.float32).ravel()
+        m = np.asarray(matrix, dtype=np.float32)
+        if m.ndim == 1:
+            m = m.reshape(1, -1)
+        if q.size == 0 or m.shape[0] == 0:
+            return np.zeros(m.shape[0], dtype=np.float32)
+
+        query_norm = np.linalg.norm(q)
+        if query_norm == 0:
+            return np.zeros(m.shape[0], dtype=np.float32)
+
+        row_norms = np.sqrt(np.einsum("nd,nd->n", m, m))
+        zero_rows = row_norms == 0
+
+        if simsimd is not None:
+            # SimSIMD geeft cosine *afstanden* terug, shape (1, N)
+            distances = np.asarray(simsimd.cdist(q[None, :], m, metric="cosine"))
+            scores = (1.0 - distances.reshape(-1)).astype(np.float32)
+        else:
+            scores = (m @ q) / (np.where(zero_rows, 1.0, row_norms) * query_norm)
+
+        scores[zero_rows] = 0.0
+        return scores
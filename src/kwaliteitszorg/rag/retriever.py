@@ -6,17 +6,21 @@ Dit is de hoofdklasse die je gebruikt om:
 2. Relevante chunks op te halen voor een vraag/eis
 """
 
-from dataclasses import dataclass
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 
 from . import config
 from .chunker import DocumentChunker, ChunkingResult, chunk_pdf_file, Chunk
 from .embedder import OllamaEmbedder, BatchEmbeddingResult
+from .semantic_cache import SemanticQueryCache
 from .vector_store import VectorStore, QueryResult
 
 
-@dataclass
+@dataclass(slots=True)
 class IndexResult:
     """Resultaat van het indexeren van een document."""
 
@@ -54,6 +58,35 @@ class RAGRetriever:
             collection_name=collection_name,
             verbose=self.verbose,
         )
+        self.query_cache = SemanticQueryCache() if config.SEMANTIC_CACHE_ENABLED else None
+        self._context_cache: "OrderedDict[tuple, str]" = OrderedDict()
+        # Generatie van de (gedeelde) vector store waarvoor de caches gelden
+        self._cache_generation: Optional[int] = None
+
+    def _invalidate_caches(self):
+        """Leeg query caches na wijzigingen in de index."""
+        if self.query_cache is not None:
+            self.query_cache.clear()
+        self._context_cache.clear()
+
+    def _sync_cache_generation(self) -> int:
+        """
+        Leeg de caches als de vector store sinds de vorige keer gewijzigd is.
+
+        De store wordt gedeeld door alle sessies (en via disk door andere
+        processen); een wijziging door een andere retriever moet hier ook de
+        caches ongeldig maken.
+
+        Returns:
+            De huidige generatie van de vector store
+        """
+        generation = self.vector_store.get_generation()
+        if generation != self._cache_generation:
+            if self._cache_generation is not None:
+                self._log("Vector store gewijzigd, caches geleegd")
+            self._invalidate_caches()
+            self._cache_generation = generation
+        return generation
 
     def _log(self, message: str):
         """Print log message als verbose aan staat."""
@@ -102,47 +135,8 @@ class RAGRetriever:
                 error=f"Chunking failed: {chunking_result.error}",
             )
 
-        # Stap 2: Genereer embeddings
-        chunk_texts = [chunk.text for chunk in chunking_result.chunks]
-        embedding_result = self.embedder.embed_batch(chunk_texts, show_progress=show_progress)
-
-        if not embedding_result.success:
-            return IndexResult(
-                success=False,
-                document_id=chunking_result.document_id,
-                document_name=path.name,
-                chunks_created=chunking_result.total_chunks,
-                chunking_result=chunking_result,
-                embedding_result=embedding_result,
-                error=f"Embedding failed: {embedding_result.errors}",
-            )
-
-        # Stap 3: Opslaan in vector store
-        success = self.vector_store.add_chunks(
-            chunks=chunking_result.chunks,
-            embeddings=embedding_result.embeddings,
-        )
-
-        if not success:
-            return IndexResult(
-                success=False,
-                document_id=chunking_result.document_id,
-                document_name=path.name,
-                chunks_created=chunking_result.total_chunks,
-                chunking_result=chunking_result,
-                embedding_result=embedding_result,
-                error="Failed to add chunks to vector store",
-            )
-
-        return IndexResult(
-            success=True,
-            document_id=chunking_result.document_id,
-            document_name=path.name,
-            chunks_created=chunking_result.total_chunks,
-            chunks_indexed=chunking_result.total_chunks,
-            chunking_result=chunking_result,
-            embedding_result=embedding_result,
-        )
+        # Stap 2 + 3: Genereer embeddings en sla op in vector store
+        return self._embed_and_store(chunking_result, path.name, show_progress=show_progress)
 
     def index_text(
         self,
@@ -181,36 +175,98 @@ class RAGRetriever:
                 error=f"Chunking failed: {chunking_result.error}",
             )
 
-        # Stap 2: Genereer embeddings
-        chunk_texts = [chunk.text for chunk in chunking_result.chunks]
-        embedding_result = self.embedder.embed_batch(chunk_texts, show_progress=False)
+        # Stap 2 + 3: Genereer embeddings en sla op
+        return self._embed_and_store(chunking_result, document_name, show_progress=False)
+
+    def _embed_and_store(
+        self,
+        chunking_result: ChunkingResult,
+        document_name: str,
+        show_progress: bool = False,
+    ) -> IndexResult:
+        """
+        Embed de chunks per window en stream ze naar de vector store.
+
+        Elk window wordt door de vector store direct in gereserveerde rijen
+        van zijn buffer geschreven, dus naast de store staat maximaal één
+        window aan embeddings in het geheugen (geen array voor het hele
+        document). Het embedden van het volgende window overlapt met het
+        wegschrijven van het huidige. Andere sessies kunnen intussen blijven
+        zoeken; de nieuwe chunks worden zichtbaar en opgeslagen als alle
+        windows binnen zijn.
+        Als een window mislukt, stopt de stream en blijft de store
+        ongewijzigd, zodat een document altijd volledig of helemaal niet
+        geïndexeerd is.
 
-        if not embedding_result.success:
+        Args:
+            chunking_result: Resultaat van het chunken
+            document_name: Naam van het document
+            show_progress: Toon voortgang
+
+        Returns:
+            IndexResult; embedding_result is alleen gevuld als embedding mislukt
+        """
+        chunks = chunking_result.chunks
+        document_id = chunking_result.document_id
+        failed_windows: List[BatchEmbeddingResult] = []
+
+        def embedding_windows():
+            # Pipeline: een aparte thread embedt window i+1 terwijl de store
+            # window i in zijn buffer schrijft. Er staat maximaal één window
+            # vooruit uit, zodat de windows in volgorde binnenkomen.
+            windows = self.embedder.embed_batch_iter(
+                [chunk.text for chunk in chunks],
+                show_progress=show_progress,
+            )
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-embed") as executor:
+                pending = executor.submit(next, windows, None)
+                while True:
+                    item = pending.result()
+                    if item is None:
+                        return
+                    start, embedding_result = item
+                    if not embedding_result.success:
+                        failed_windows.append(embedding_result)
+                        return
+                    pending = executor.submit(next, windows, None)
+                    yield start, embedding_result.embeddings
+
+        stored = self.vector_store.add_chunks_streaming(chunks, embedding_windows())
+
+        if failed_windows:
+            embedding_result = failed_windows[0]
             error_details = ""
             if embedding_result.errors:
                 error_details = f": {embedding_result.errors[0]}" if len(embedding_result.errors) == 1 else f": {embedding_result.errors[:3]}"
             return IndexResult(
                 success=False,
-                document_id=chunking_result.document_id,
+                document_id=document_id,
                 document_name=document_name,
                 chunks_created=chunking_result.total_chunks,
+                chunking_result=chunking_result,
+                embedding_result=embedding_result,
                 error=f"Embedding failed ({embedding_result.failed_count}/{embedding_result.total_texts} mislukt){error_details}",
             )
 
-        # Stap 3: Opslaan
-        success = self.vector_store.add_chunks(
-            chunks=chunking_result.chunks,
-            embeddings=embedding_result.embeddings,
-        )
+        if not stored:
+            return IndexResult(
+                success=False,
+                document_id=document_id,
+                document_name=document_name,
+                chunks_created=chunking_result.total_chunks,
+                chunking_result=chunking_result,
+                error="Failed to add chunks to vector store",
+            )
+
+        self._invalidate_caches()
 
         return IndexResult(
-            success=success,
-            document_id=chunking_result.document_id,
+            success=True,
+            document_id=document_id,
             document_name=document_name,
             chunks_created=chunking_result.total_chunks,
-            chunks_indexed=chunking_result.total_chunks if success else 0,
+            chunks_indexed=len(chunks),
             chunking_result=chunking_result,
-            embedding_result=embedding_result,
         )
 
     def retrieve(
@@ -247,8 +303,23 @@ class RAGRetriever:
                 error=f"Query embedding failed: {query_result.error}",
             )
 
+        # Probeer eerst de semantische cache (zelfde parameters, bijna zelfde
+        # query, zelfde versie van de index)
+        cache_scope = (
+            self._sync_cache_generation(),
+            top_k,
+            min_similarity,
+            filter_document,
+            tuple(sorted(filter_document_ids)) if filter_document_ids else None,
+        )
+        if self.query_cache is not None:
+            cached = self.query_cache.get(query_result.embedding, scope=cache_scope)
+            if cached is not None:
+                self._log("Semantische cache hit")
+                return replace(cached, query_text=query)
+
         # Zoek in vector store
-        return self.vector_store.query(
+        result = self.vector_store.query(
             query_embedding=query_result.embedding,
             query_text=query,
             top_k=top_k,
@@ -257,6 +328,11 @@ class RAGRetriever:
             filter_document_ids=filter_document_ids,
         )
 
+        if self.query_cache is not None and result.success:
+            self.query_cache.put(query_result.embedding, result, scope=cache_scope)
+
+        return result
+
     def retrieve_for_eis(
         self,
         retrieval_query: str,
@@ -284,14 +360,21 @@ class RAGRetriever:
         query: str,
         max_chunks: int = None,
         max_chars: int = None,
+        filter_document_ids: List[str] = None,
     ) -> str:
         """
         Haal context op en format voor gebruik in LLM prompt.
 
+        Resultaten worden in een LRU cache bewaard (sleutel: hash van de
+        query, de parameters en de generatie van de vector store), zodat een
+        herhaalde vraag geen nieuwe embedding en zoekactie kost. De cache
+        wordt geleegd zodra de index verandert, ook door een andere sessie.
+
         Args:
             query: De zoek query
             max_chunks: Maximum aantal chunks
             max_chars: Maximum totaal karakters
+            filter_document_ids: Optioneel filter op specifieke documenten
 
         Returns:
             Geformatteerde context string
@@ -299,24 +382,40 @@ class RAGRetriever:
         max_chunks = max_chunks or config.DEFAULT_TOP_K
         max_chars = max_chars or config.MAX_CONTEXT_CHARS
 
-        result = self.retrieve(query, top_k=max_chunks)
+        query_hash = hashlib.blake2b(query.encode("utf-8"), digest_size=16).hexdigest()
+        filter_sig = tuple(sorted(filter_document_ids)) if filter_document_ids else None
+        cache_key = (self._sync_cache_generation(), query_hash, max_chunks, max_chars, filter_sig)
+
+        cached = self._context_cache.get(cache_key)
+        if cached is not None:
+            self._context_cache.move_to_end(cache_key)
+            return cached
+
+        result = self.retrieve(query, top_k=max_chunks, filter_document_ids=filter_document_ids)
 
-        if not result.success or not result.chunks:
+        if not result.success:
             return ""
 
-        context = result.format_context_for_llm(max_chunks)
+        context = ""
+        if result.chunks:
+            context = result.format_context_for_llm(max_chunks)
+            if len(context) > max_chars:
+                context = context[:max_chars] + "\n\n[Context ingekort...]"
 
-        if len(context) > max_chars:
-            context = context[:max_chars] + "\n\n[Context ingekort...]"
+        self._context_cache[cache_key] = context
+        if len(self._context_cache) > config.CONTEXT_CACHE_SIZE:
+            self._context_cache.popitem(last=False)
 
         return context
 
     def delete_document(self, document_id: str) -> bool:
         """Verwijder een document uit de index."""
+        self._invalidate_caches()
         return self.vector_store.delete_document(document_id)
 
     def clear_all(self) -> bool:
         """Verwijder alle geindexeerde data."""
+        self._invalidate_caches()
         return self.vector_store.clear_collection()
 
     def list_indexed_documents(self) -> List[Dict[str, Any]]:
@@ -0,0 +1,145 @@
+"""
+Semantische query cache voor RAG.
+
+Houdt recente query embeddings met hun QueryResult bij. Een nieuwe query
+waarvan de embedding (bijna) gelijk is aan een eerdere query krijgt het
+eerdere resultaat terug, zonder de vector store opnieuw te doorzoeken.
+
+Kandidaten worden gevonden via random-projection LSH: per tabel bepalen
+de tekens van een aantal willekeurige projecties een bucket. Alleen
+entries in dezelfde bucket(s) worden met cosine similarity vergeleken.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from . import config
+from .vector_store import QueryResult
+
+
+class SemanticQueryCache:
+    """
+    LRU cache van QueryResults, opzoekbaar op query embedding.
+
+    Args:
+        num_tables: Aantal LSH tabellen (meer = hogere recall)
+        bits: Aantal projecties per tabel (meer = kleinere buckets)
+        capacity: Maximum aantal entries (oudste wordt verwijderd)
+        threshold: Minimum cosine similarity voor een cache hit
+        seed: Seed voor de random projecties
+    """
+
+    def __init__(
+        self,
+        num_tables: int = 8,
+        bits: int = 12,
+        capacity: int = None,
+        threshold: float = None,
+        seed: int = 0,
+    ):
+        self.num_tables = num_tables
+        self.bits = bits
+        self.capacity = capacity or config.SEMANTIC_CACHE_CAPACITY
+        self.threshold = threshold or config.SEMANTIC_CACHE_THRESHOLD
+        self._rng = np.random.default_rng(seed)
+        self._bit_weights = 1 << np.arange(bits, dtype=np.int64)
+
+        # Projectie matrices worden aangemaakt zodra de dimensie bekend is
+        self._planes: Optional[np.ndarray] = None
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, Hashable, Tuple[int, ...], QueryResult]]" = OrderedDict()
+        self._buckets: List[Dict[Tuple[Hashable, int], Set[int]]] = [{} for _ in range(num_tables)]
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        """Verwijder alle entries (bijv. na wijzigingen in de vector store)."""
+        self._entries.clear()
+        self._buckets = [{} for _ in range(self.num_tables)]
+
+    def _normalize(self, embedding) -> Optional[np.ndarray]:
+        """Converteer naar een genormaliseerde float32 vector."""
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vec)
+        if vec.size == 0 or norm == 0:
+            return None
+
+        if self._planes is None or self._planes.shape[2] != vec.size:
+            # Nieuwe (of andere) dimensie: oude entries zijn niet vergelijkbaar
+            self.clear()
+            self._planes = self._rng.standard_normal(
+                (self.num_tables, self.bits, vec.size)
+            ).astype(np.float32)
+
+        return vec / norm
+
+    def _signatures(self, vec: np.ndarray) -> Tuple[int, ...]:
+        """Bereken per tabel de bucket signature (tekens van de projecties)."""
+        signs = (self._planes @ vec) > 0  # shape (num_tables, bits)
+        return tuple(int(s) for s in signs.astype(np.int64) @ self._bit_weights)
+
+    def get(self, embedding, scope: Hashable = None) -> Optional[QueryResult]:
+        """
+        Zoek een eerder resultaat voor een (bijna) gelijke query.
+
+        Args:
+            embedding: De query embedding
+            scope: Overige query parameters (top_k, filters, ...); alleen
+                entries met exact dezelfde scope komen in aanmerking
+
+        Returns:
+            Het gecachete QueryResult, of None bij een miss
+        """
+        if not self._entries:
+            return None
+
+        vec = self._normalize(embedding)
+        if vec is None:
+            return None
+
+        candidates: Set[int] = set()
+        for table, signature in zip(self._buckets, self._signatures(vec)):
+            candidates.update(table.get((scope, signature), ()))
+
+        best_id, best_sim = None, self.threshold
+        for entry_id in candidates:
+            entry_vec = self._entries[entry_id][0]
+            sim = float(entry_vec @ vec)
+            if sim >= best_sim:
+                best_id, best_sim = entry_id, sim
+
+        if best_id is None:
+            return None
+
+        self._entries.move_to_end(best_id)
+        return self._entries[best_id][3]
+
+    def put(self, embedding, result: QueryResult, scope: Hashable = None):
+        """Voeg een query resultaat toe aan de cache."""
+        vec = self._normalize(embedding)
+        if vec is None:
+            return
+
+        signatures = self._signatures(vec)
+        entry_id = self._next_id
+        self._next_id += 1
+
+        self._entries[entry_id] = (vec, scope, signatures, result)
+        for table, signature in zip(self._buckets, signatures):
+            table.setdefault((scope, signature), set()).add(entry_id)
+
+        while len(self._entries) > self.capacity:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        """Verwijder de minst recent gebruikte entry."""
+        entry_id, (_, scope, signatures, _) = self._entries.popitem(last=False)
+        for table, signature in zip(self._buckets, signatures):
+            bucket = table.get((scope, signature))
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del table[(scope, signature)]
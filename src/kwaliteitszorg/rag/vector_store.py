@@ -2,20 +2,128 @@
 Vector Store voor RAG.
 
 Eenvoudige vector store gebaseerd op NumPy voor similarity search.
-Volledig lokaal, geen externe dependencies behalve NumPy.
+Volledig lokaal, geen externe dependencies behalve NumPy (SimSIMD optioneel).
 """
 
+import functools
 import json
+import math
+import os
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
+import msgpack
 import numpy as np
 
 from . import config
 from .chunker import Chunk
 
+# Optioneel: fcntl voor een file lock tussen processen (alleen POSIX)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Optioneel: SimSIMD voor SIMD-versnelde (AVX2/AVX-512/NEON) dot products
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+# Optioneel: Numba voor een gefuseerde score-kernel
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# Score voor rijen die door het document filter vallen (onder elke cosine)
+_EXCLUDED_SCORE = -2.0
+
+# Aantal dimensies per blok waarna de kernel checkt of een rij nog boven
+# de drempel kan uitkomen
+_SCORE_BLOCK_SIZE = 16
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _score_kernel(embeddings, query, allowed, min_similarity):
+        """
+        Dot product, document filter en drempel in één parallelle pass.
+
+        Rijen met allowed[i] == False worden niet gescoord. Na elk blok van
+        _SCORE_BLOCK_SIZE dimensies wordt met Cauchy-Schwarz begrensd wat
+        de rest van de rij nog kan bijdragen; kan de rij min_similarity niet
+        meer halen, dan wordt hij afgebroken. Omdat de rijen genormaliseerd
+        zijn is de resterende rij-norm sqrt(1 - som tot nu toe), zonder
+        opgeslagen prefix sums. Afgebroken en weggefilterde rijen krijgen
+        _EXCLUDED_SCORE.
+        """
+        n, d = embeddings.shape
+        num_blocks = (d + _SCORE_BLOCK_SIZE - 1) // _SCORE_BLOCK_SIZE
+
+        # Norm van het resterende deel van de query vanaf elk blok
+        query_remaining = np.zeros(num_blocks + 1, dtype=np.float32)
+        for b in range(num_blocks - 1, -1, -1):
+            block_sq = np.float32(0.0)
+            for j in range(b * _SCORE_BLOCK_SIZE, min((b + 1) * _SCORE_BLOCK_SIZE, d)):
+                block_sq += query[j] * query[j]
+            query_remaining[b] = query_remaining[b + 1] + block_sq
+        for b in range(num_blocks + 1):
+            query_remaining[b] = np.sqrt(query_remaining[b])
+
+        scores = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            if not allowed[i]:
+                scores[i] = _EXCLUDED_SCORE
+                continue
+            acc = np.float32(0.0)
+            row_sq = np.float32(0.0)
+            abandoned = False
+            for b in range(num_blocks):
+                for j in range(b * _SCORE_BLOCK_SIZE, min((b + 1) * _SCORE_BLOCK_SIZE, d)):
+                    value = embeddings[i, j]
+                    acc += value * query[j]
+                    row_sq += value * value
+                bound = np.sqrt(max(np.float32(1.0) - row_sq, np.float32(0.0))) * query_remaining[b + 1]
+                if acc + bound < min_similarity:
+                    abandoned = True
+                    break
+            scores[i] = _EXCLUDED_SCORE if abandoned else acc
+        return scores
+else:
+    _score_kernel = None
+
+
+# Eén gedeelde instantie per (persist_path, collection_name) binnen het proces
+_STORES: Dict[Tuple[str, str], "VectorStore"] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def _synchronized(method):
+    """Voer een methode uit onder de lock van de (gedeelde) store."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _synchronized_write(method):
+    """
+    Voer een mutatie uit onder de schrijflock en de lock van de store.
+
+    Altijd in deze volgorde (schrijflock, dan lock), net als
+    add_chunks_streaming, zodat schrijvers elkaar niet deadlocken.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock, self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 @dataclass
 class RetrievedChunk:
@@ -91,24 +199,76 @@ class VectorStore:
     """
     Eenvoudige vector store gebaseerd op NumPy.
 
-    Slaat embeddings op in een NumPy array en metadata in JSON.
+    Slaat embeddings L2-genormaliseerd op in een NumPy array en metadata
+    in MessagePack.
     Alle data wordt lokaal opgeslagen.
+
+    Per (persist_path, collection_name) bestaat binnen een proces één
+    instantie: alle Streamlit sessies delen dezelfde data in het geheugen.
+    Wijzigingen door andere processen worden via de mtime van de bestanden
+    opgemerkt.
     """
 
+    def __new__(
+        cls,
+        persist_path: str = None,
+        collection_name: str = None,
+        verbose: bool = None,
+    ):
+        key = (
+            str(Path(persist_path or config.RAG_DATA_DIR).resolve()),
+            collection_name or config.COLLECTION_NAME,
+        )
+        with _STORES_LOCK:
+            store = _STORES.get(key)
+            if store is None:
+                store = super().__new__(cls)
+                store._initialized = False
+                store._lock = threading.RLock()
+                # Schrijvers onderling; een stream houdt deze vast terwijl hij
+                # embedt, zonder lezers (die alleen _lock nemen) te blokkeren
+                store._write_lock = threading.RLock()
+                _STORES[key] = store
+        return store
+
     def __init__(
         self,
         persist_path: str = None,
         collection_name: str = None,
         verbose: bool = None,
     ):
+        with self._lock:
+            if self._initialized:
+                return
+            self._init_state(persist_path, collection_name, verbose)
+            self._initialized = True
+
+    def _init_state(self, persist_path: str, collection_name: str, verbose: bool):
+        """Initialiseer de gedeelde instantie en laad de data van disk."""
         self.persist_path = Path(persist_path or config.RAG_DATA_DIR)
         self.collection_name = collection_name or config.COLLECTION_NAME
         self.verbose = verbose if verbose is not None else config.VERBOSE
 
         self._embeddings: Optional[np.ndarray] = None
+        # Backing buffer met extra capaciteit; _embeddings is dan een view
+        # op de eerste rijen. None als _embeddings geen view op een buffer is.
+        self._buffer: Optional[np.ndarray] = None
         self._metadata: List[Dict[str, Any]] = []
         self._texts: List[str] = []
         self._ids: List[str] = []
+        # Bestandssignatuur (mtime, size) van de laatst geladen/opgeslagen data
+        self._disk_signature: Optional[tuple] = None
+        # Verhoogd bij elke wijziging van de data (mutatie of herladen van
+        # disk), zodat caches buiten de store kunnen zien dat ze verouderd zijn
+        self._generation = 0
+        # Nesting diepte van _file_lock (de flock wordt maar één keer genomen)
+        self._file_lock_depth = 0
+        # Document ID per chunk als int codes, voor gevectoriseerd filteren
+        self._doc_id_vocab: Dict[str, int] = {}
+        self._doc_codes: np.ndarray = np.zeros(0, dtype=np.int32)
+        self._next_doc_code = 0
+        # Statistieken per document (voor list_documents), bijgewerkt bij mutaties
+        self._doc_stats: Dict[str, Dict[str, Any]] = {}
 
         self.persist_path.mkdir(parents=True, exist_ok=True)
         self._load()
@@ -120,33 +280,191 @@ class VectorStore:
 
     def _get_data_path(self) -> Path:
         """Get path voor data bestanden."""
+        return self.persist_path / f"{self.collection_name}_data.msgpack"
+
+    def _get_legacy_data_path(self) -> Path:
+        """Get path van het oude JSON databestand (alleen nog gelezen)."""
         return self.persist_path / f"{self.collection_name}_data.json"
 
     def _get_embeddings_path(self) -> Path:
         """Get path voor embeddings bestand."""
         return self.persist_path / f"{self.collection_name}_embeddings.npy"
 
+    def _get_lock_path(self) -> Path:
+        """Get path van het lock bestand voor schrijvers en lezers."""
+        return self.persist_path / f"{self.collection_name}.lock"
+
+    @contextmanager
+    def _file_lock(self, shared: bool = False):
+        """
+        Houd een file lock vast tussen processen.
+
+        Schrijvers nemen een exclusieve lock, lezers een gedeelde, zodat een
+        lezer nooit het nieuwe databestand met de oude embeddings combineert.
+        Reentrant: een geneste aanroep (bijv. _save binnen een mutatie die de
+        lock al heeft) draait onder de buitenste lock. Aanroepers houden
+        altijd self._lock vast. Zonder fcntl (Windows) is dit een no-op.
+        """
+        if fcntl is None or self._file_lock_depth:
+            yield
+            return
+        with open(self._get_lock_path(), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            self._file_lock_depth += 1
+            try:
+                yield
+            finally:
+                self._file_lock_depth -= 1
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _replace_file(path: Path, content: bytes):
+        """Schrijf naar een tijdelijk bestand en vervang `path` daarna atomair."""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _get_disk_signature(self) -> tuple:
+        """Bepaal (mtime, size) van de databestanden; None als een bestand ontbreekt."""
+        signature = []
+        for path in (self._get_data_path(), self._get_embeddings_path()):
+            try:
+                stat = path.stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _reload_if_stale(self):
+        """Herlaad alleen als de bestanden op disk gewijzigd zijn (bijv. door een andere sessie)."""
+        if self._get_disk_signature() != self._disk_signature:
+            self._log("Bestanden gewijzigd op disk, herladen")
+            self._load()
+
+    def _build_document_index(self):
+        """Bouw de document codes en statistieken opnieuw op uit alle metadata."""
+        self._doc_id_vocab = {}
+        self._doc_codes = np.zeros(0, dtype=np.int32)
+        self._next_doc_code = 0
+        self._doc_stats = {}
+        self._index_chunks(self._metadata)
+
+    def _index_chunks(self, metadata_list: List[Dict[str, Any]]):
+        """Werk document codes en statistieken bij voor achteraan toegevoegde chunks."""
+        vocab = self._doc_id_vocab
+        stats = self._doc_stats
+        codes = np.empty(len(metadata_list), dtype=np.int32)
+
+        for i, metadata in enumerate(metadata_list):
+            doc_id = metadata.get("document_id")
+            code = vocab.get(doc_id)
+            if code is None:
+                # Eigen teller: na een delete kan len(vocab) al in gebruik zijn
+                code = vocab[doc_id] = self._next_doc_code
+                self._next_doc_code += 1
+            codes[i] = code
+
+            key = metadata.get("document_id", "unknown")
+            document = stats.get(key)
+            if document is None:
+                document = stats[key] = {
+                    "document_id": key,
+                    "document_name": metadata.get("document_name", "unknown"),
+                    "chunk_count": 0,
+                    "total_chars": 0,
+                }
+            document["chunk_count"] += 1
+            document["total_chars"] += metadata.get("char_count", 0)
+
+        self._doc_codes = np.concatenate([self._doc_codes, codes])
+
+    def _reserve(self, needed: int, dimensions: int):
+        """
+        Zorg dat de buffer ruimte heeft voor `needed` rijen.
+
+        Groeit geometrisch (minimaal verdubbelen), zodat herhaald toevoegen
+        amortized O(1) per rij kost in plaats van steeds alles te kopiëren.
+        Rijen voorbij len(_embeddings) zijn niet zichtbaar en mogen vrij
+        beschreven worden.
+        """
+        size = 0 if self._embeddings is None else len(self._embeddings)
+        if (
+            self._buffer is not None
+            and len(self._buffer) >= needed
+            and self._buffer.shape[1] == dimensions
+        ):
+            return
+
+        buffer = np.empty((max(needed, 2 * size), dimensions), dtype=np.float32)
+        if size:
+            buffer[:size] = self._embeddings
+        self._buffer = buffer
+        self._embeddings = buffer[:size]
+
+    @staticmethod
+    def _normalize_rows(embeddings: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        L2-normaliseer elke rij, zodat cosine similarity een dot product wordt.
+
+        Nul-vectoren blijven nul (en krijgen dus similarity 0). Voor
+        eenheidsvectoren geldt ook ||p - q||^2 = 2 - 2 * p.q, dus ook een
+        L2-afstand volgt uit hetzelfde dot product zonder opgeslagen normen.
+        Met `out` wordt het resultaat direct daarin geschreven (bijv. in
+        gereserveerde rijen van de buffer) in plaats van in een nieuwe array.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2 or len(embeddings) == 0:
+            if out is not None:
+                out[...] = embeddings
+                return out
+            return embeddings
+        # einsum: kwadraat en som in één pass, zonder de dispatch van linalg.norm
+        norms = np.sqrt(np.einsum("ij,ij->i", embeddings, embeddings))
+        norms[norms == 0] = 1
+        return np.divide(embeddings, norms[:, None], out=out)
+
     def _save(self):
         """Sla data op naar disk."""
         data = {
             "ids": self._ids,
             "texts": self._texts,
             "metadata": self._metadata,
+            # Embeddings op disk zijn L2-genormaliseerd
+            "normalized": True,
             "saved_at": datetime.now().isoformat(),
         }
 
-        with open(self._get_data_path(), "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # MessagePack: binair, veel sneller te (de)serialiseren dan JSON
+        packed = msgpack.packb(data, use_bin_type=True)
 
-        embeddings_path = self._get_embeddings_path()
-        if self._embeddings is not None and len(self._embeddings) > 0:
-            np.save(embeddings_path, self._embeddings)
-        else:
-            # Verwijder embeddings file als er geen embeddings meer zijn
-            if embeddings_path.exists():
-                embeddings_path.unlink()
-                self._log("Embeddings file verwijderd (geen data)")
+        with self._file_lock():
+            # Beide bestanden atomair vervangen: een lezer in een ander proces
+            # ziet nooit een half geschreven bestand
+            self._replace_file(self._get_data_path(), packed)
+
+            legacy_path = self._get_legacy_data_path()
+            if legacy_path.exists():
+                legacy_path.unlink()
+                self._log("Oud JSON databestand vervangen door MessagePack")
 
+            embeddings_path = self._get_embeddings_path()
+            if self._embeddings is not None and len(self._embeddings) > 0:
+                # Ook nodig omdat andere processen het oude bestand nog
+                # gememory-mapt kunnen hebben; in-place overschrijven zou hun
+                # mapping corrumperen
+                tmp_path = embeddings_path.with_name(embeddings_path.name + ".tmp")
+                with open(tmp_path, "wb") as f:
+                    np.save(f, self._embeddings.astype(config.EMBEDDING_STORAGE_DTYPE, copy=False))
+                os.replace(tmp_path, embeddings_path)
+            else:
+                # Verwijder embeddings file als er geen embeddings meer zijn
+                if embeddings_path.exists():
+                    embeddings_path.unlink()
+                    self._log("Embeddings file verwijderd (geen data)")
+
+            self._disk_signature = self._get_disk_signature()
+        self._generation += 1
         self._log(f"Data opgeslagen: {len(self._ids)} chunks")
 
     def _load(self):
@@ -154,35 +472,75 @@ class VectorStore:
         data_path = self._get_data_path()
         embeddings_path = self._get_embeddings_path()
 
-        # Reset state
-        self._ids = []
-        self._texts = []
-        self._metadata = []
-        self._embeddings = None
+        # Gedeelde lock: een schrijver in een ander proces vervangt de
+        # bestanden niet halverwege het lezen
+        with self._file_lock(shared=True):
+            # Signatuur vóór het lezen, zodat een wijziging tijdens het lezen
+            # bij de volgende check alsnog een reload geeft
+            signature = self._get_disk_signature()
 
-        if data_path.exists():
-            with open(data_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            # Reset state
+            self._ids = []
+            self._texts = []
+            self._metadata = []
+            self._embeddings = None
+            self._buffer = None
+            normalized = False
 
-            self._ids = data.get("ids", [])
-            self._texts = data.get("texts", [])
-            self._metadata = data.get("metadata", [])
+            data = None
+            legacy_path = self._get_legacy_data_path()
+            if data_path.exists():
+                with open(data_path, "rb") as f:
+                    data = msgpack.unpackb(f.read(), raw=False)
+            elif legacy_path.exists():
+                # Stores van voor de MessagePack opslag; bij de volgende save omgezet
+                with open(legacy_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
 
-            self._log(f"Metadata geladen: {len(self._ids)} chunks")
+            if data is not None:
+                self._ids = data.get("ids", [])
+                self._texts = data.get("texts", [])
+                self._metadata = data.get("metadata", [])
+                normalized = data.get("normalized", False)
 
-        if embeddings_path.exists():
-            self._embeddings = np.load(embeddings_path)
-            self._log(f"Embeddings geladen: shape {self._embeddings.shape}")
+                self._log(f"Metadata geladen: {len(self._ids)} chunks")
 
-            # Valideer sync na laden
-            if len(self._ids) != len(self._embeddings):
-                self._log(f"WARNING: Data out of sync na laden! {len(self._ids)} ids vs {len(self._embeddings)} embeddings")
-                # Als metadata leeg is maar embeddings niet, verwijder embeddings
-                if len(self._ids) == 0:
-                    self._log("Verwijder orphan embeddings file")
-                    embeddings_path.unlink()
-                    self._embeddings = None
+            if embeddings_path.exists():
+                # Memory-mapped (read-only): de OS page cache levert de data en
+                # deelt die tussen processen. Rekenen gebeurt altijd in C-contiguous
+                # float32 (BLAS sgemv); alleen bij een ander dtype of een Fortran
+                # layout op disk wordt er gekopieerd.
+                stored = np.load(embeddings_path, mmap_mode="r")
+                self._embeddings = np.ascontiguousarray(stored, dtype=np.float32)
+                if stored.dtype != np.float32 and len(self._embeddings):
+                    # Na afronden naar bijv. float16 zijn de rijen niet meer
+                    # exact eenheidsvectoren; de early abandon in de score
+                    # kernel gaat daar wel van uit en zou echte hits missen
+                    self._embeddings = self._normalize_rows(self._embeddings)
+                self._log(f"Embeddings geladen: shape {self._embeddings.shape}")
+
+                # Valideer sync na laden
+                if len(self._ids) != len(self._embeddings):
+                    self._log(f"WARNING: Data out of sync na laden! {len(self._ids)} ids vs {len(self._embeddings)} embeddings")
+                    # Als metadata leeg is maar embeddings niet, verwijder embeddings
+                    if len(self._ids) == 0:
+                        self._log("Verwijder orphan embeddings file")
+                        embeddings_path.unlink()
+                        self._embeddings = None
+
+            self._disk_signature = signature
+
+        if not normalized and self._embeddings is not None and len(self._ids) == len(self._embeddings):
+            # Oudere stores bevatten ruwe embeddings: normaliseer één keer en
+            # sla op, zodat volgende loads (bij elke query) dit niet herhalen
+            self._log("Migreer embeddings naar genormaliseerde opslag")
+            self._embeddings = self._normalize_rows(self._embeddings)
+            self._save()
 
+        self._build_document_index()
+        self._generation += 1
+
+    @_synchronized
     def get_stats(self) -> Dict[str, Any]:
         """Haal statistieken op over de vector store."""
         return {
@@ -192,17 +550,31 @@ class VectorStore:
             "embedding_dimensions": self._embeddings.shape[1] if self._embeddings is not None and len(self._embeddings) > 0 else 0,
         }
 
+    @_synchronized
+    def get_generation(self) -> int:
+        """
+        Geef de huidige generatie van de data terug.
+
+        Herlaadt eerst als een ander proces de store gewijzigd heeft; een
+        andere waarde dan eerder betekent dat gecachte zoekresultaten
+        verouderd kunnen zijn.
+        """
+        self._reload_if_stale()
+        return self._generation
+
+    @_synchronized_write
     def add_chunks(
         self,
         chunks: List[Chunk],
-        embeddings: List[List[float]],
+        embeddings: Union[np.ndarray, List[List[float]]],
     ) -> bool:
         """
         Voeg chunks met embeddings toe aan de store.
 
         Args:
             chunks: Lijst van Chunk objecten
-            embeddings: Corresponderende embeddings
+            embeddings: Corresponderende embeddings, bij voorkeur als
+                (N, D) float32 array
 
         Returns:
             True als succesvol
@@ -210,10 +582,23 @@ class VectorStore:
         if len(chunks) != len(embeddings):
             self._log(f"ERROR: Mismatch tussen chunks ({len(chunks)}) en embeddings ({len(embeddings)})")
             return False
+        if not chunks:
+            return True
 
-        # BELANGRIJK: Herlaad altijd van disk voor we toevoegen
-        # Dit voorkomt sync problemen tussen Streamlit sessies
-        self._load()
+        # Exclusieve file lock van herladen tot en met opslaan, zodat twee
+        # processen elkaars toevoegingen niet overschrijven
+        with self._file_lock():
+            return self._add_chunks_locked(chunks, embeddings)
+
+    def _add_chunks_locked(
+        self,
+        chunks: List[Chunk],
+        embeddings: Union[np.ndarray, List[List[float]]],
+    ) -> bool:
+        """Voeg chunks toe; aanroeper houdt self._lock en de file lock vast."""
+        # BELANGRIJK: Herlaad van disk als een ander proces de store gewijzigd heeft
+        # (sessies binnen dit proces delen deze instantie al)
+        self._reload_if_stale()
 
         self._log(f"Voeg {len(chunks)} chunks toe (huidige stand: {len(self._ids)} chunks)")
 
@@ -223,12 +608,18 @@ class VectorStore:
                 self._texts.append(chunk.text)
                 self._metadata.append(chunk.to_metadata_dict())
 
-            new_embeddings = np.array(embeddings)
+            new_embeddings = self._normalize_rows(embeddings)
+            if self._embeddings is not None and len(self._embeddings) and new_embeddings.shape[1] != self._embeddings.shape[1]:
+                self._log(f"ERROR: Dimensie mismatch ({new_embeddings.shape[1]} vs {self._embeddings.shape[1]})")
+                self._load()
+                return False
 
-            if self._embeddings is None or len(self._embeddings) == 0:
-                self._embeddings = new_embeddings
-            else:
-                self._embeddings = np.vstack([self._embeddings, new_embeddings])
+            # Schrijf in de vrije capaciteit van de buffer (geen vstack kopie)
+            existing = 0 if self._embeddings is None else len(self._embeddings)
+            needed = existing + len(new_embeddings)
+            self._reserve(needed, new_embeddings.shape[1])
+            self._buffer[existing:needed] = new_embeddings
+            self._embeddings = self._buffer[:needed]
 
             # Valideer voor opslaan
             if len(self._ids) != len(self._embeddings):
@@ -237,6 +628,7 @@ class VectorStore:
                 self._load()
                 return False
 
+            self._index_chunks(self._metadata[-len(chunks):])
             self._save()
             self._log(f"Succesvol toegevoegd. Totaal: {len(self._ids)} chunks")
             return True
@@ -247,9 +639,111 @@ class VectorStore:
             self._load()
             return False
 
+    def add_chunks_streaming(
+        self,
+        chunks: List[Chunk],
+        embedding_windows: Iterable[Tuple[int, np.ndarray]],
+    ) -> bool:
+        """
+        Voeg chunks toe terwijl hun embeddings per window binnenkomen.
+
+        Bij het eerste window wordt capaciteit voor alle chunks gereserveerd
+        in de buffer van de store. Elk volgend window wordt direct in die
+        (nog onzichtbare) rijen genormaliseerd, zodat er naast de buffer
+        nooit meer dan één window aan embeddings in het geheugen staat.
+        De generator (die Ollama aanroept) draait zonder de lock van de
+        store: query's van andere sessies lopen gewoon door. Alleen andere
+        schrijvers wachten (de schrijflock), zodat niemand de gereserveerde
+        rijen overschrijft.
+
+        Pas als alle windows binnen zijn worden metadata, document codes en
+        het aantal zichtbare rijen onder de lock gepubliceerd en opgeslagen.
+        Stopt de stream eerder (bijv. omdat embedden mislukt), dan blijft
+        de store ongewijzigd.
+
+        Args:
+            chunks: Lijst van Chunk objecten
+            embedding_windows: Iterable van (start index, (n, D) embeddings),
+                aansluitend en in volgorde, bijv. van OllamaEmbedder.embed_batch_iter
+
+        Returns:
+            True als alle chunks zijn toegevoegd
+        """
+        with self._write_lock:
+            buffer: Optional[np.ndarray] = None
+            existing = 0
+            filled = 0
+
+            try:
+                for start, window in embedding_windows:
+                    window = np.asarray(window, dtype=np.float32)
+                    if start != filled or window.ndim != 2 or filled + len(window) > len(chunks):
+                        self._log(f"ERROR: Onverwacht window (start {start}, shape {window.shape}) na {filled} chunks")
+                        return False
+
+                    if buffer is None:
+                        with self._lock:
+                            # BELANGRIJK: Herlaad van disk als een ander proces de store gewijzigd heeft
+                            self._reload_if_stale()
+                            existing = 0 if self._embeddings is None else len(self._embeddings)
+                            if existing and self._embeddings.shape[1] != window.shape[1]:
+                                self._log(f"ERROR: Dimensie mismatch ({window.shape[1]} vs {self._embeddings.shape[1]})")
+                                return False
+                            self._log(f"Voeg {len(chunks)} chunks toe via stream (huidige stand: {existing} chunks)")
+                            self._reserve(existing + len(chunks), window.shape[1])
+                            buffer = self._buffer
+                    elif window.shape[1] != buffer.shape[1]:
+                        self._log(f"ERROR: Dimensie mismatch binnen stream ({window.shape[1]} vs {buffer.shape[1]})")
+                        return False
+
+                    # Gereserveerde rijen voorbij len(_embeddings): lezers zien ze nog niet
+                    offset = existing + filled
+                    self._normalize_rows(window, out=buffer[offset:offset + len(window)])
+                    filled += len(window)
+
+            except Exception as e:
+                self._log(f"ERROR bij ontvangen embeddings: {str(e)}")
+                return False
+
+            if filled != len(chunks):
+                self._log(f"ERROR: Stream gestopt na {filled} van {len(chunks)} chunks, niets toegevoegd")
+                return False
+
+            if not chunks:
+                return True
+
+            # Exclusieve file lock van herladen tot en met opslaan
+            with self._lock, self._file_lock():
+                self._reload_if_stale()
+                current = 0 if self._embeddings is None else len(self._embeddings)
+                if self._buffer is not buffer or current != existing:
+                    # De store is intussen herladen (bijv. na een wijziging door
+                    # een ander proces): voeg de rijen toe aan de nieuwe state
+                    self._log("Store gewijzigd tijdens stream, rijen opnieuw toegevoegd")
+                    return self._add_chunks_locked(chunks, buffer[existing:existing + filled])
+
+                try:
+                    for chunk in chunks:
+                        self._ids.append(chunk.chunk_id)
+                        self._texts.append(chunk.text)
+                        self._metadata.append(chunk.to_metadata_dict())
+                    self._embeddings = buffer[:existing + filled]
+                    self._index_chunks(self._metadata[-len(chunks):])
+
+                    self._save()
+                    self._log(f"Succesvol toegevoegd. Totaal: {len(self._ids)} chunks")
+                    return True
+
+                except Exception as e:
+                    self._log(f"ERROR bij toevoegen: {str(e)}")
+                    # Rollback naar disk state
+                    self._load()
+                    return False
+
+    @_synchronized
     def query(
         self,
-        query_embedding: List[float],
+        query_embedding: Union[np.ndarray, List[float]],
         query_text: str = "",
         top_k: int = None,
         min_similarity: float = None,
@@ -270,8 +764,8 @@ class VectorStore:
         Returns:
             QueryResult met gevonden chunks
         """
-        # Herlaad van disk om zeker te zijn dat we actuele data hebben
-        self._load()
+        # Herlaad van disk als de bestanden gewijzigd zijn sinds de laatste load
+        self._reload_if_stale()
 
         top_k = top_k or config.DEFAULT_TOP_K
         min_similarity = min_similarity or config.MIN_SIMILARITY_THRESHOLD
@@ -298,57 +792,66 @@ class VectorStore:
                         error="Data synchronisatie probleem. Probeer de pagina te verversen.",
                     )
 
-            query_vec = np.array(query_embedding)
-
-            query_norm = np.linalg.norm(query_vec)
-            embedding_norms = np.linalg.norm(self._embeddings, axis=1)
-
-            valid_mask = (embedding_norms > 0) & (query_norm > 0)
+            # Opgeslagen embeddings zijn genormaliseerd: normaliseer alleen
+            # de query, dan is cosine similarity één matrix-vector product
+            query_vec = np.ascontiguousarray(query_embedding, dtype=np.float32)
+            query_squared_norm = float(np.vdot(query_vec, query_vec))
+            if query_squared_norm > 0:
+                query_vec = query_vec / math.sqrt(query_squared_norm)
 
-            similarities = np.zeros(len(self._embeddings))
-            if np.any(valid_mask):
-                dot_products = np.dot(self._embeddings[valid_mask], query_vec)
-                similarities[valid_mask] = dot_products / (embedding_norms[valid_mask] * query_norm)
-
-            # Filter op document(en)
+            # Filter op document(en): bepaal vooraf welke rijen meedoen,
+            # zodat weggefilterde chunks niet eens gescoord worden
+            candidate_rows = None
             if filter_document_ids:
                 # Filter op meerdere documenten
-                allowed_ids = set(filter_document_ids)
-                for i, meta in enumerate(self._metadata):
-                    if meta.get("document_id") not in allowed_ids:
-                        similarities[i] = -1
+                allowed_ids = filter_document_ids
             elif filter_document_id:
                 # Backwards compatible: filter op enkel document
-                for i, meta in enumerate(self._metadata):
-                    if meta.get("document_id") != filter_document_id:
-                        similarities[i] = -1
+                allowed_ids = [filter_document_id]
+            else:
+                allowed_ids = None
 
-            valid_indices = np.where(similarities >= min_similarity)[0]
-            sorted_indices = valid_indices[np.argsort(similarities[valid_indices])[::-1]]
-            top_indices = sorted_indices[:top_k]
-
-            retrieved_chunks = []
-            for idx in top_indices:
-                # Extra bounds check
-                if idx >= len(self._metadata) or idx >= len(self._texts) or idx >= len(self._ids):
-                    self._log(f"WARNING: Index {idx} out of bounds, skipping")
-                    continue
-                similarity = float(similarities[idx])
-                metadata = self._metadata[idx]
-
-                chunk = RetrievedChunk(
-                    chunk_id=self._ids[idx],
-                    text=self._texts[idx],
-                    similarity_score=similarity,
-                    distance=1 - similarity,
-                    document_name=metadata.get("document_name", ""),
-                    document_id=metadata.get("document_id", ""),
-                    chunk_index=metadata.get("chunk_index", 0),
-                    total_chunks=metadata.get("total_chunks", 0),
-                    page_number=metadata.get("page_number"),
-                    section_header=metadata.get("section_header"),
+            allowed_mask = self._get_allowed_mask(allowed_ids)
+
+            if _score_kernel is not None:
+                # Numba: scoren, filteren en vroeg afbreken in één pass
+                if allowed_mask is None:
+                    allowed_mask = np.ones(len(self._embeddings), dtype=np.bool_)
+                similarities = _score_kernel(
+                    self._embeddings, query_vec, allowed_mask, np.float32(min_similarity)
                 )
-                retrieved_chunks.append(chunk)
+            else:
+                embeddings = self._embeddings
+                if allowed_mask is not None:
+                    candidate_rows = np.flatnonzero(allowed_mask)
+                    embeddings = embeddings[candidate_rows]
+
+                if len(embeddings) == 0:
+                    similarities = np.zeros(0, dtype=np.float32)
+                elif simsimd is not None:
+                    # Genormaliseerde vectoren: cosine similarity = dot product
+                    similarities = np.asarray(
+                        simsimd.cdist(embeddings, query_vec[None, :], metric="dot"),
+                        dtype=np.float32,
+                    ).ravel()
+                else:
+                    similarities = embeddings @ query_vec
+
+            valid_indices = np.where(similarities >= min_similarity)[0]
+            scores = similarities[valid_indices]
+            if len(scores) > top_k:
+                # Selecteer eerst de top_k in O(N), sorteer daarna alleen die
+                top = np.argpartition(-scores, top_k - 1)[:top_k]
+                top = top[np.argsort(-scores[top])]
+            else:
+                top = np.argsort(-scores)
+            top_indices = valid_indices[top]
+            top_scores = scores[top]
+            if candidate_rows is not None:
+                # Terug naar indices in de volledige store
+                top_indices = candidate_rows[top_indices]
+
+            retrieved_chunks = self._build_retrieved_chunks(top_indices, top_scores)
 
             self._log(f"Gevonden: {len(retrieved_chunks)} chunks boven threshold")
 
@@ -368,28 +871,189 @@ class VectorStore:
                 error=str(e),
             )
 
+    @_synchronized
+    def batch_query(
+        self,
+        query_embeddings: Union[np.ndarray, List[List[float]]],
+        query_texts: List[str] = None,
+        top_k: int = None,
+        min_similarity: float = None,
+        filter_document_ids: List[str] = None,
+    ) -> List[QueryResult]:
+        """
+        Zoek voor meerdere queries tegelijk naar relevante chunks.
+
+        Alle similarities worden berekend met één matrix-matrix product
+        (SGEMM) in plaats van een matrix-vector product per query, en de
+        top_k wordt per rij in één argpartition geselecteerd.
+
+        Args:
+            query_embeddings: (Q, D) embeddings van de queries
+            query_texts: Optioneel de originele query teksten (Q stuks)
+            top_k: Aantal resultaten per query
+            min_similarity: Minimum similarity threshold
+            filter_document_ids: Optioneel filter op meerdere documenten
+
+        Returns:
+            Een QueryResult per query, in dezelfde volgorde
+        """
+        # Herlaad van disk als de bestanden gewijzigd zijn sinds de laatste load
+        self._reload_if_stale()
+
+        top_k = top_k or config.DEFAULT_TOP_K
+        min_similarity = min_similarity or config.MIN_SIMILARITY_THRESHOLD
+
+        queries = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        query_texts = query_texts or [""] * len(queries)
+
+        if self._embeddings is None or len(self._embeddings) == 0:
+            return [
+                QueryResult(success=True, chunks=[], query_text=text, total_results=0)
+                for text in query_texts
+            ]
+
+        try:
+            if len(self._embeddings) != len(self._metadata):
+                self._log(f"WARNING: embeddings ({len(self._embeddings)}) en metadata ({len(self._metadata)}) niet in sync!")
+                return [
+                    QueryResult(
+                        success=False,
+                        chunks=[],
+                        query_text=text,
+                        error="Data synchronisatie probleem. Probeer de pagina te verversen.",
+                    )
+                    for text in query_texts
+                ]
+
+            queries = self._normalize_rows(queries)
+
+            candidate_rows = None
+            embeddings = self._embeddings
+            allowed_mask = self._get_allowed_mask(filter_document_ids or None)
+            if allowed_mask is not None:
+                candidate_rows = np.flatnonzero(allowed_mask)
+                embeddings = embeddings[candidate_rows]
+
+            if len(embeddings) == 0:
+                return [
+                    QueryResult(success=True, chunks=[], query_text=text, total_results=0)
+                    for text in query_texts
+                ]
+
+            similarities = queries @ embeddings.T  # shape (Q, N)
+
+            # Top_k per rij: partitioneer, sorteer daarna alleen de k kandidaten
+            k = min(top_k, similarities.shape[1])
+            if k < similarities.shape[1]:
+                top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(k), similarities.shape).copy()
+            top_scores = np.take_along_axis(similarities, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            if candidate_rows is not None:
+                top = candidate_rows[top]
+
+            results = []
+            for text, row_indices, row_scores in zip(query_texts, top, top_scores):
+                keep = row_scores >= min_similarity
+                retrieved_chunks = self._build_retrieved_chunks(row_indices[keep], row_scores[keep])
+                results.append(QueryResult(
+                    success=True,
+                    chunks=retrieved_chunks,
+                    query_text=text,
+                    total_results=len(retrieved_chunks),
+                ))
+
+            self._log(f"Batch query: {len(results)} queries")
+            return results
+
+        except Exception as e:
+            self._log(f"ERROR bij batch query: {str(e)}")
+            return [
+                QueryResult(success=False, chunks=[], query_text=text, error=str(e))
+                for text in query_texts
+            ]
+
+    def _get_allowed_mask(self, allowed_ids: Optional[List[str]]) -> Optional[np.ndarray]:
+        """Bool mask van chunks uit de toegestane documenten; None = geen filter."""
+        if allowed_ids is None:
+            return None
+        allowed_codes = [self._doc_id_vocab[doc_id] for doc_id in allowed_ids if doc_id in self._doc_id_vocab]
+        return np.isin(self._doc_codes, allowed_codes)
+
+    def _build_retrieved_chunks(
+        self,
+        indices: np.ndarray,
+        scores: np.ndarray,
+    ) -> List[RetrievedChunk]:
+        """Maak RetrievedChunk objecten voor de gegeven store indices."""
+        retrieved_chunks = []
+        for idx, score in zip(indices, scores):
+            # Extra bounds check
+            if idx >= len(self._metadata) or idx >= len(self._texts) or idx >= len(self._ids):
+                self._log(f"WARNING: Index {idx} out of bounds, skipping")
+                continue
+            similarity = float(score)
+            metadata = self._metadata[idx]
+
+            chunk = RetrievedChunk(
+                chunk_id=self._ids[idx],
+                text=self._texts[idx],
+                similarity_score=similarity,
+                distance=1 - similarity,
+                document_name=metadata.get("document_name", ""),
+                document_id=metadata.get("document_id", ""),
+                chunk_index=metadata.get("chunk_index", 0),
+                total_chunks=metadata.get("total_chunks", 0),
+                page_number=metadata.get("page_number"),
+                section_header=metadata.get("section_header"),
+            )
+            retrieved_chunks.append(chunk)
+        return retrieved_chunks
+
+    @_synchronized_write
     def delete_document(self, document_id: str) -> bool:
         """Verwijder alle chunks van een document."""
+        # Exclusieve file lock van herladen tot en met opslaan
+        with self._file_lock():
+            return self._delete_document_locked(document_id)
+
+    def _delete_document_locked(self, document_id: str) -> bool:
+        """Verwijder een document; aanroeper houdt self._lock en de file lock vast."""
         try:
-            indices_to_remove = []
-            for i, meta in enumerate(self._metadata):
-                if meta.get("document_id") == document_id:
-                    indices_to_remove.append(i)
+            # Een ander proces kan het document net (opnieuw) toegevoegd hebben
+            self._reload_if_stale()
+
+            code = self._doc_id_vocab.get(document_id)
+            remove_mask = (
+                self._doc_codes == code
+                if code is not None
+                else np.zeros(len(self._doc_codes), dtype=bool)
+            )
+            remove_count = int(remove_mask.sum())
 
-            if not indices_to_remove:
+            if not remove_count:
                 self._log(f"Geen chunks gevonden voor document {document_id}")
                 return True
 
-            self._log(f"Verwijder {len(indices_to_remove)} chunks voor document {document_id}")
+            self._log(f"Verwijder {remove_count} chunks voor document {document_id}")
 
-            for idx in sorted(indices_to_remove, reverse=True):
-                del self._ids[idx]
-                del self._texts[idx]
-                del self._metadata[idx]
+            # Eén pass per lijst in plaats van herhaalde `del` (elk O(N))
+            keep_mask = ~remove_mask
+            keep = np.flatnonzero(keep_mask).tolist()
+            self._ids = [self._ids[i] for i in keep]
+            self._texts = [self._texts[i] for i in keep]
+            self._metadata = [self._metadata[i] for i in keep]
 
-            mask = np.ones(len(self._embeddings), dtype=bool)
-            mask[indices_to_remove] = False
-            self._embeddings = self._embeddings[mask]
+            self._embeddings = np.ascontiguousarray(self._embeddings[keep_mask], dtype=np.float32)
+            self._buffer = None
+            self._doc_codes = self._doc_codes[keep_mask]
+            del self._doc_id_vocab[document_id]
+            self._doc_stats.pop(document_id, None)
 
             self._save()
             return True
@@ -398,23 +1062,31 @@ class VectorStore:
             self._log(f"ERROR bij verwijderen: {str(e)}")
             return False
 
+    @_synchronized_write
     def clear_collection(self) -> bool:
         """Verwijder alle data uit de collection."""
         try:
             self._log(f"Verwijder alle data uit collection: {self.collection_name}")
 
-            self._ids = []
-            self._texts = []
-            self._metadata = []
-            self._embeddings = None
-
             data_path = self._get_data_path()
             embeddings_path = self._get_embeddings_path()
 
-            if data_path.exists():
-                data_path.unlink()
-            if embeddings_path.exists():
-                embeddings_path.unlink()
+            with self._file_lock():
+                self._ids = []
+                self._texts = []
+                self._metadata = []
+                self._embeddings = None
+                self._buffer = None
+                self._build_document_index()
+
+                if data_path.exists():
+                    data_path.unlink()
+                if self._get_legacy_data_path().exists():
+                    self._get_legacy_data_path().unlink()
+                if embeddings_path.exists():
+                    embeddings_path.unlink()
+                self._disk_signature = self._get_disk_signature()
+            self._generation += 1
 
             return True
 
@@ -422,22 +1094,11 @@ class VectorStore:
             self._log(f"ERROR bij clearen: {str(e)}")
             return False
 
+    @_synchronized
     def list_documents(self) -> List[Dict[str, Any]]:
         """Lijst alle geindexeerde documenten."""
-        documents = {}
-        for metadata in self._metadata:
-            doc_id = metadata.get("document_id", "unknown")
-            if doc_id not in documents:
-                documents[doc_id] = {
-                    "document_id": doc_id,
-                    "document_name": metadata.get("document_name", "unknown"),
-                    "chunk_count": 0,
-                    "total_chars": 0,
-                }
-            documents[doc_id]["chunk_count"] += 1
-            documents[doc_id]["total_chars"] += metadata.get("char_count", 0)
-
-        return list(documents.values())
+        # Statistieken worden bijgehouden bij elke mutatie; geef kopieën terug
+        return [dict(document) for document in self._doc_stats.values()]
 
     def is_empty(self) -> bool:
         """Check of de vector store leeg is."""
@@ -12,6 +12,7 @@ from .pdf_processor import (
     PDFImportError,
     PDFProcessingError,
     extract_text_from_pdf,
+    extract_texts_from_pdfs,
     estimate_token_count,
     validate_document_size,
 )
@@ -25,6 +26,7 @@ __all__ = [
     "DatabaseError",
     # PDF Processing
     "extract_text_from_pdf",
+    "extract_texts_from_pdfs",
     "estimate_token_count",
     "validate_document_size",
     "DocumentResult",
@@ -4,8 +4,17 @@ Dit module bevat functies voor het laden van de deugdelijkheidseisen database.
 """
 
 import json
+import os
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, Optional
 
+# Optioneel: orjson parset JSON een stuk sneller dan de standaard json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from config.settings import logger
 
 
@@ -23,10 +32,24 @@ class DatabaseError(Exception):
     pass
 
 
+@lru_cache(maxsize=8)
+def _load_database_cached(database_path: str, mtime_ns: int, size: int) -> Dict:
+    """Parse het databasebestand; gecachet per (pad, mtime, grootte)."""
+    with open(database_path, "rb") as f:
+        content = f.read()
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content.decode("utf-8"))
+
+
 def load_database(database_path: str) -> Dict:
     """
     Laadt de deugdelijkheidseisen database uit JSON bestand.
 
+    Het geparste bestand wordt gecachet zolang het niet wijzigt op disk;
+    herhaalde aanroepen geven dezelfde dictionary terug. Die mag dus niet
+    gemuteerd worden.
+
     Args:
         database_path: Pad naar het JSON bestand
 
@@ -37,8 +60,8 @@ def load_database(database_path: str) -> Dict:
         DatabaseError: Als het bestand niet geladen kan worden
     """
     try:
-        with open(database_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        stat = os.stat(database_path)
+        return _load_database_cached(str(database_path), stat.st_mtime_ns, stat.st_size)
     except FileNotFoundError:
         logger.error("Database bestand '%s' niet gevonden.", database_path)
         raise DatabaseError(f"Database bestand niet gevonden: {database_path}")
@@ -47,6 +70,30 @@ def load_database(database_path: str) -> Dict:
         raise DatabaseError(f"Database bestand is geen geldige JSON: {e}")
 
 
+# Per database (op identiteit): eisen met hun "id" al ingevuld, zodat
+# load_deugdelijkheidseis niet per aanroep een kopie hoeft te maken.
+# De database zelf wordt meebewaard, zodat id(database) niet hergebruikt
+# kan worden zolang de entry bestaat.
+_EIS_VIEWS: "OrderedDict[int, tuple]" = OrderedDict()
+_EIS_VIEWS_MAX = 8
+
+
+def _get_eis_view(database: Dict) -> Dict[str, Dict]:
+    """Haal de eisen (met "id") van een database op; gecachet per database object."""
+    key = id(database)
+    entry = _EIS_VIEWS.get(key)
+    if entry is not None and entry[0] is database:
+        _EIS_VIEWS.move_to_end(key)
+        return entry[1]
+
+    eisen = database.get("deugdelijkheidseisen", {})
+    view = {eis_id: {**eis, "id": eis_id} for eis_id, eis in eisen.items()}
+    _EIS_VIEWS[key] = (database, view)
+    while len(_EIS_VIEWS) > _EIS_VIEWS_MAX:
+        _EIS_VIEWS.popitem(last=False)
+    return view
+
+
 def load_deugdelijkheidseis(
     database: Dict, deugdelijkheidseis_id: str, raise_on_not_found: bool = False
 ) -> Optional[Dict]:
@@ -59,16 +106,13 @@ def load_deugdelijkheidseis(
         raise_on_not_found: Als True, raise EisNotFoundError. Als False, return placeholder.
 
     Returns:
-        Dictionary met eis data, of placeholder als niet gevonden
+        Dictionary met eis data (gedeeld, niet muteren), of placeholder als niet gevonden
 
     Raises:
         EisNotFoundError: Als de eis niet gevonden wordt en raise_on_not_found=True
     """
-    eisen = database.get("deugdelijkheidseisen", {})
-
-    if deugdelijkheidseis_id in eisen:
-        eis = eisen[deugdelijkheidseis_id].copy()
-        eis["id"] = deugdelijkheidseis_id
+    eis = _get_eis_view(database).get(deugdelijkheidseis_id)
+    if eis is not None:
         return eis
 
     logger.warning(
@@ -10,13 +10,52 @@ Features:
 - Tekst cleaning en normalisatie
 """
 
+import dataclasses
+import hashlib
+import io
+import multiprocessing
+import os
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 
 from config import settings
+# Eenmalig gebonden standaardlimieten; extractie (_resolve_limits) en
+# validate_document_size gebruiken allebei deze waarden
+from config.settings import MAX_DOCUMENT_CHARS as _DEFAULT_MAX_CHARS
+from config.settings import MAX_DOCUMENT_PAGES as _DEFAULT_MAX_PAGES
 from config.settings import logger
 
+# Optioneel: PyMuPDF voor PDF extractie (eenmalig bij import, niet per aanroep).
+# Recente versies geven een deprecation warning bij `import fitz`.
+try:
+    import pymupdf as fitz
+except ImportError:
+    try:
+        import fitz  # PyMuPDF < 1.24.3
+    except ImportError:
+        fitz = None
+
+# Eenmalig gecompileerde patronen voor _clean_extracted_text
+_RE_CRLF = re.compile(r"\r\n?")
+_RE_MULTI_NL = re.compile(r"\n{3,}")
+_RE_MULTI_SP = re.compile(r"[ \t]{2,}")
+# Whitespace rond een regeleinde (zelfde tekens als str.strip, behalve \n)
+_RE_TRIM_LINE = re.compile(r"[^\S\n]*\n[^\S\n]*")
+
+# Standaard maximum, eenmalig geformatteerd voor de foutmelding van validate_document_size
+_DEFAULT_MAX_CHARS_FMT = f"{_DEFAULT_MAX_CHARS:,}"
+
+# Venstergrootte (karakters) voor het tellen van woorden in estimate_token_count
+_WORD_COUNT_WINDOW = 1 << 16
+
+# LRU cache van extractieresultaten, op inhoud-hash van het PDF bestand
+_RESULT_CACHE: "OrderedDict[tuple, DocumentResult]" = OrderedDict()
+_RESULT_CACHE_LOCK = threading.Lock()
+
 
 class PDFProcessingError(Exception):
     """Exception voor PDF verwerkingsfouten."""
@@ -56,7 +95,7 @@ class DocumentResult:
 
 
 def extract_text_from_pdf(
-    file_bytes: bytes,
+    file_bytes: Union[bytes, bytearray, memoryview],
     filename: str,
     max_pages: Optional[int] = None,
     max_chars: Optional[int] = None,
@@ -66,7 +105,8 @@ def extract_text_from_pdf(
     Extraheer tekst uit een PDF bestand.
 
     Args:
-        file_bytes: Ruwe bytes van het PDF bestand
+        file_bytes: Ruwe bytes van het PDF bestand; ook een buffer zoals
+            UploadedFile.getbuffer() (wordt niet gekopieerd)
         filename: Naam van het bestand (voor logging/display)
         max_pages: Maximum aantal pagina's om te verwerken (default uit settings)
         max_chars: Maximum aantal karakters (default uit settings)
@@ -78,10 +118,13 @@ def extract_text_from_pdf(
     Note:
         Bij fouten wordt een DocumentResult met success=False geretourneerd,
         geen exception geraised. Dit maakt error handling in de UI eenvoudiger.
+
+        Tekst wordt in de goedkope "text" modus geëxtraheerd, zonder sortering
+        en zonder ligaturen te bewaren (fi/fl worden losse letters, wat ook
+        beter zoekt). Structuur per blok ("dict"/"rawdict") is niet nodig en
+        kost per pagina veel meer allocaties.
     """
-    try:
-        import fitz  # PyMuPDF
-    except ImportError:
+    if fitz is None:
         logger.error("PyMuPDF niet geïnstalleerd. Installeer met: pip install PyMuPDF")
         return DocumentResult(
             success=False,
@@ -93,90 +136,96 @@ def extract_text_from_pdf(
             error="PDF verwerking niet beschikbaar. Installeer PyMuPDF met: pip install PyMuPDF"
         )
 
-    # Bij unlimited: gebruik zeer hoge limieten
-    if unlimited:
-        max_pages = 1000  # Praktisch ongelimiteerd
-        max_chars = 10_000_000  # 10 miljoen karakters
-    else:
-        max_pages = max_pages or settings.MAX_DOCUMENT_PAGES
-        max_chars = max_chars or settings.MAX_DOCUMENT_CHARS
+    max_pages, max_chars = _resolve_limits(max_pages, max_chars, unlimited)
+
+    # Zelfde bytes en limieten geven hetzelfde resultaat: sla extractie over
+    # bij herhaalde uploads van hetzelfde document
+    cache_key = _cache_key(file_bytes, filename, max_pages, max_chars)
+    cached = _get_cached_result(cache_key)
+    if cached is not None:
+        logger.debug("PDF uit cache: %s", filename)
+        return cached
+
+    # Standaard tekstflags, maar ligaturen uitgeschreven als losse letters
+    text_flags = fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_LIGATURES
 
     try:
-        doc = fitz.open(stream=file_bytes, filetype="pdf")
-        total_pages = len(doc)
-        text_parts = []
-        page_boundaries = []  # (page_num, char_start, char_end)
-        chars_collected = 0
-        pages_processed = 0
-        truncated = False
-
-        for page_num in range(min(total_pages, max_pages)):
-            page = doc[page_num]
-            page_text = page.get_text()
-
-            # Check karakter limiet
-            if chars_collected + len(page_text) > max_chars:
-                # Neem alleen wat nog past
+        # Via een memoryview leest MuPDF direct uit de bestaande buffer;
+        # een bytearray zou PyMuPDF eerst naar bytes kopiëren
+        doc = fitz.open(stream=memoryview(file_bytes).cast("B"), filetype="pdf")
+        try:
+            total_pages = len(doc)
+            # Eén groeiende buffer i.p.v. een lijst + "\n".join: geen tweede
+            # kopie van alle tekst op het piekmoment
+            buf = io.StringIO()
+            page_boundaries = []  # (page_num, char_start, char_end) in de schone tekst
+            chars_collected = 0  # Ruwe karakters, voor de max_chars limiet
+            cleaned_char_count = 0  # Lengte van de schone tekst tot nu toe
+            pages_processed = 0
+            truncated = False
+
+            # doc.pages() laadt pagina's lazy en stopt bij de limiet, zonder
+            # de eerste pagina voorbij max_pages nog te openen
+            for page in doc.pages(0, min(total_pages, max_pages)):
+                page_num = page.number
+                page_text = page.get_text("text", flags=text_flags, sort=False)
+                page = None  # Geef de MuPDF pagina direct vrij
+
+                # Check karakter limiet
                 remaining = max_chars - chars_collected
-                if remaining > 0:
-                    text_parts.append(page_text[:remaining])
-                    # Track partial page boundary
-                    page_boundaries.append((page_num + 1, chars_collected, chars_collected + remaining))
-                truncated = True
+                if len(page_text) > remaining:
+                    # Neem alleen wat nog past van de al geëxtraheerde tekst
+                    page_text = page_text[:max(remaining, 0)]
+                    truncated = True
+                chars_collected += len(page_text)
                 pages_processed = page_num + 1
-                break
-
-            # Track page boundary (1-indexed page numbers)
-            page_boundaries.append((page_num + 1, chars_collected, chars_collected + len(page_text)))
-
-            text_parts.append(page_text)
-            chars_collected += len(page_text)
-            pages_processed = page_num + 1
-
-        # Check of we pagina's hebben overgeslagen
-        if total_pages > max_pages:
-            truncated = True
-
-        doc.close()
 
-        # Clean elke pagina apart en bereken nauwkeurige page boundaries
-        # Dit is nauwkeuriger dan een globale ratio, omdat cleaning
-        # verschillende hoeveelheden tekst verwijdert per pagina.
-        cleaned_parts = []
-        adjusted_boundaries = []
-        cleaned_offset = 0
-
-        for i, raw_page_text in enumerate(text_parts):
-            cleaned_page = _clean_extracted_text(raw_page_text)
-            page_num = page_boundaries[i][0] if i < len(page_boundaries) else i + 1
-
-            if cleaned_page:
-                adjusted_boundaries.append(
-                    (page_num, cleaned_offset, cleaned_offset + len(cleaned_page))
-                )
-                cleaned_parts.append(cleaned_page)
-                cleaned_offset += len(cleaned_page) + 1  # +1 voor de "\n" joiner
+                # Clean elke pagina apart, zodat de boundaries (1-indexed page
+                # numbers) direct naar de schone tekst wijzen: cleaning
+                # verwijdert per pagina verschillende hoeveelheden tekst
+                cleaned_page = _clean_extracted_text(page_text)
+                if cleaned_page:
+                    if cleaned_char_count:
+                        buf.write("\n")
+                        cleaned_char_count += 1  # +1 voor de "\n" scheiding
+                    page_boundaries.append(
+                        (page_num + 1, cleaned_char_count, cleaned_char_count + len(cleaned_page))
+                    )
+                    buf.write(cleaned_page)
+                    cleaned_char_count += len(cleaned_page)
+
+                if truncated:
+                    break
+
+            # Check of we pagina's hebben overgeslagen
+            if total_pages > max_pages:
+                truncated = True
+        finally:
+            # Ook bij een exception de MuPDF handle vrijgeven
+            doc.close()
 
-        cleaned_text = "\n".join(cleaned_parts)
+        cleaned_text = buf.getvalue()
 
         logger.info(
             "PDF verwerkt: %s (%d/%d pagina's, %d karakters%s)",
             filename,
             pages_processed,
             total_pages,
-            len(cleaned_text),
+            cleaned_char_count,
             ", ingekort" if truncated else ""
         )
 
-        return DocumentResult(
+        result = DocumentResult(
             success=True,
             text=cleaned_text,
             filename=filename,
             page_count=pages_processed,
-            char_count=len(cleaned_text),
+            char_count=cleaned_char_count,
             truncated=truncated,
-            page_boundaries=adjusted_boundaries,
+            page_boundaries=page_boundaries,
         )
+        _store_cached_result(cache_key, result)
+        return result
 
     except Exception as e:
         logger.error("Fout bij verwerken PDF '%s': %s", filename, e)
@@ -191,6 +240,118 @@ def extract_text_from_pdf(
         )
 
 
+def extract_texts_from_pdfs(
+    files: List[Tuple[Union[bytes, bytearray, memoryview], str]],
+    unlimited: bool = True,
+    max_workers: Optional[int] = None,
+) -> List[DocumentResult]:
+    """
+    Extraheer tekst uit meerdere PDF bestanden parallel (bijv. voor RAG bulk indexering).
+
+    Elk bestand wordt in een eigen proces verwerkt, zodat de extractie over
+    alle cores verdeeld wordt. Bestanden die al in de cache staan worden
+    niet opnieuw verwerkt. De workers worden met "spawn" gestart: fork in
+    een multi-threaded proces (Streamlit, de embedder event loop) kan
+    locks in een vergrendelde toestand naar het kind kopiëren.
+
+    Args:
+        files: Lijst van (file_bytes, filename) tuples
+        unlimited: Als True, geen limieten toepassen (default voor RAG)
+        max_workers: Maximum aantal processen (default: aantal cores)
+
+    Returns:
+        DocumentResults in dezelfde volgorde als `files`
+    """
+    max_pages, max_chars = _resolve_limits(None, None, unlimited)
+    results: List[Optional[DocumentResult]] = [None] * len(files)
+    pending = []  # (index, cache_key, file_bytes, filename)
+
+    for index, (file_bytes, filename) in enumerate(files):
+        cache_key = _cache_key(file_bytes, filename, max_pages, max_chars)
+        results[index] = _get_cached_result(cache_key)
+        if results[index] is None:
+            pending.append((index, cache_key, file_bytes, filename))
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(pending))
+    if max_workers <= 1:
+        # Eén bestand (of één worker): processen opstarten loont niet
+        for index, _, file_bytes, filename in pending:
+            results[index] = extract_text_from_pdf(file_bytes, filename, unlimited=unlimited)
+        return results
+
+    # Buffers (memoryview) zijn niet te picklen: stuur bytes naar de workers
+    tasks = [(bytes(file_bytes), filename, unlimited) for _, _, file_bytes, filename in pending]
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+        extracted = executor.map(_extract_single, tasks, chunksize=2)
+        for (index, cache_key, _, _), result in zip(pending, extracted):
+            if result.success:
+                _store_cached_result(cache_key, result)
+            results[index] = result
+
+    return results
+
+
+def _extract_single(task: Tuple[bytes, str, bool]) -> DocumentResult:
+    """Worker voor extract_texts_from_pdfs (module-level, zodat hij te picklen is)."""
+    file_bytes, filename, unlimited = task
+    return extract_text_from_pdf(file_bytes, filename, unlimited=unlimited)
+
+
+def _resolve_limits(
+    max_pages: Optional[int],
+    max_chars: Optional[int],
+    unlimited: bool,
+) -> Tuple[int, int]:
+    """Bepaal de effectieve pagina- en karakterlimiet."""
+    # Bij unlimited: gebruik zeer hoge limieten
+    if unlimited:
+        return 1000, 10_000_000  # Praktisch ongelimiteerd, 10 miljoen karakters
+    return (
+        max_pages or _DEFAULT_MAX_PAGES,
+        max_chars or _DEFAULT_MAX_CHARS,
+    )
+
+
+def _cache_key(file_bytes, filename: str, max_pages: int, max_chars: int) -> tuple:
+    """Cache key voor een extractie: inhoud-hash plus naam en limieten."""
+    return (
+        hashlib.blake2b(file_bytes, digest_size=16).digest(),
+        filename,
+        max_pages,
+        max_chars,
+    )
+
+
+def _get_cached_result(key: tuple) -> Optional[DocumentResult]:
+    """Haal een eerder extractieresultaat op (als kopie), of None."""
+    with _RESULT_CACHE_LOCK:
+        result = _RESULT_CACHE.get(key)
+        if result is None:
+            return None
+        _RESULT_CACHE.move_to_end(key)
+    # Ondiepe kopie: de tekst is immutable, de boundaries lijst ook kopiëren
+    return dataclasses.replace(
+        result,
+        page_boundaries=list(result.page_boundaries) if result.page_boundaries else result.page_boundaries,
+    )
+
+
+def _store_cached_result(key: tuple, result: DocumentResult):
+    """Bewaar een succesvol extractieresultaat; verwijder de oudste bij overloop."""
+    if settings.PDF_CACHE_SIZE <= 0:
+        return
+    with _RESULT_CACHE_LOCK:
+        # Eigen kopie van de boundaries lijst: de aanroeper houdt het origineel
+        _RESULT_CACHE[key] = dataclasses.replace(
+            result,
+            page_boundaries=list(result.page_boundaries) if result.page_boundaries is not None else None,
+        )
+        _RESULT_CACHE.move_to_end(key)
+        while len(_RESULT_CACHE) > settings.PDF_CACHE_SIZE:
+            _RESULT_CACHE.popitem(last=False)
+
+
 def _clean_extracted_text(text: str) -> str:
     """
     Maak geëxtraheerde tekst schoon.
@@ -200,17 +361,16 @@ def _clean_extracted_text(text: str) -> str:
     - Verwijdert bekende PDF artefacten
     """
     # Normaliseer regeleindes
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = _RE_CRLF.sub("\n", text)
 
     # Verwijder excessive lege regels (meer dan 2 achter elkaar)
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = _RE_MULTI_NL.sub("\n\n", text)
 
     # Verwijder excessive spaties
-    text = re.sub(r"[ \t]{2,}", " ", text)
+    text = _RE_MULTI_SP.sub(" ", text)
 
-    # Trim elke regel
-    lines = [line.strip() for line in text.split("\n")]
-    text = "\n".join(lines)
+    # Trim elke regel (zonder split/join; begin en eind doet de strip hieronder)
+    text = _RE_TRIM_LINE.sub("\n", text)
 
     # Verwijder leading/trailing whitespace
     text = text.strip()
@@ -224,8 +384,21 @@ def estimate_token_count(text: str) -> int:
 
     Gebruikt een simpele heuristiek: ~1.3 tokens per woord voor Nederlands.
     Dit is een ruwe schatting, geen exacte telling.
+
+    Telt per venster van _WORD_COUNT_WINDOW karakters (uitgelijnd op
+    whitespace), zodat er nooit een lijst van alle woorden van een groot
+    document tegelijk in het geheugen staat.
     """
-    word_count = len(text.split())
+    word_count = 0
+    start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + _WORD_COUNT_WINDOW, length)
+        # Schuif het einde door tot whitespace, zodat geen woord gesplitst wordt
+        while end < length and not text[end].isspace():
+            end += 1
+        word_count += len(text[start:end].split())
+        start = end
     return int(word_count * 1.3)
 
 
@@ -239,12 +412,15 @@ def validate_document_size(
     Returns:
         Tuple van (is_valid, message)
     """
-    max_chars = max_chars or settings.MAX_DOCUMENT_CHARS
+    max_chars = max_chars or _DEFAULT_MAX_CHARS
 
     if char_count > max_chars:
+        max_chars_fmt = (
+            _DEFAULT_MAX_CHARS_FMT if max_chars == _DEFAULT_MAX_CHARS else f"{max_chars:,}"
+        )
         return False, (
             f"Document te groot ({char_count:,} karakters). "
-            f"Maximum is {max_chars:,} karakters."
+            f"Maximum is {max_chars_fmt} karakters."
         )
 
     if char_count == 0:
@@ -0,0 +1,79 @@
+"""
+Tests voor de system message van vervolgberichten (zonder Ollama).
+
+_generate wordt vervangen, zodat alleen de opgebouwde berichten getest worden.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.kwaliteitszorg import DeugdelijkheidseisAssistent, SchoolInvulling
+from src.kwaliteitszorg.assistant import assistent as assistent_module
+from src.kwaliteitszorg.utils.pdf_processor import estimate_token_count
+
+EIS_ID = "VS1.5"
+RAG_CONTEXT = "Uit het schoolplan: de anti-pestcoordinator is bekend bij alle leerlingen. " * 20
+
+
+@pytest.fixture
+def assistent():
+    assistent = DeugdelijkheidseisAssistent()
+    sent = []
+
+    def fake_generate(messages, stream_handler):
+        sent.append(messages)
+        return "Een antwoord van de assistent. " * 30
+
+    assistent._generate = fake_generate
+    assistent.sent = sent
+    return assistent
+
+
+@pytest.fixture
+def invulling():
+    return SchoolInvulling(
+        ambitie="Duidelijk aanspreekpunt voor pesten",
+        beoogd_resultaat="90% bekendheid anti-pestcoordinator",
+        concrete_acties="Mw. De Vries aangesteld, posters opgehangen, in schoolgids",
+        wijze_van_meten="Jaarlijkse enquete",
+    )
+
+
+def system_messages(assistent):
+    return [messages[0]["content"] for messages in assistent.sent]
+
+
+def test_follow_up_reuses_first_system_message_when_it_fits(assistent, invulling):
+    """Zelfde context en genoeg ruimte: exact dezelfde system message (KV prefix)."""
+    for vraag in ("Geef feedback", "En wat kan beter?", "Kun je een voorbeeld geven?"):
+        assistent.chat(EIS_ID, invulling, vraag, rag_context=RAG_CONTEXT)
+
+    first, *follow_ups = system_messages(assistent)
+    assert "Voorbeelden:" in first
+    assert all(message == first for message in follow_ups)
+
+
+def test_follow_up_falls_back_to_reduced_message_when_context_is_full(assistent, invulling, monkeypatch):
+    """Past de volledige prompt plus geschiedenis niet meer, dan zonder tips/voorbeelden."""
+    full = assistent._build_system_message(EIS_ID, invulling, "algemeen", rag_context=RAG_CONTEXT)
+    reduced = assistent._build_system_message(
+        EIS_ID, invulling, "algemeen", rag_context=RAG_CONTEXT, include_voorbeelden=False,
+    )
+    # Ruimte voor de compacte prompt met geschiedenis, niet voor de volledige
+    num_predict = assistent_module._OLLAMA_OPTIONS["num_predict"]
+    num_ctx = num_predict + (estimate_token_count(full) + estimate_token_count(reduced)) // 2 + 200
+    monkeypatch.setitem(assistent_module._OLLAMA_OPTIONS, "num_ctx", num_ctx)
+
+    for vraag in ("Geef feedback", "En wat kan beter?", "Kun je een voorbeeld geven?"):
+        assistent.chat(EIS_ID, invulling, vraag, rag_context=RAG_CONTEXT)
+
+    first, second, third = system_messages(assistent)
+    assert first == full
+    assert second == reduced
+    assert third == reduced
+    assert "Voorbeelden:" not in reduced
@@ -0,0 +1,29 @@
+"""
+Tests voor de DocumentChunker (zonder Ollama).
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.kwaliteitszorg.rag.chunker import DocumentChunker
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("abc def", "abc"),
+        ("abc def\n", "abc"),
+        ("abc def\n\n", "abc def"),
+        ("abc def ", "abc def"),
+        ("abc", "abc"),
+    ],
+)
+def test_trim_to_word_boundary_from_end(text, expected):
+    """Het laatste (mogelijk afgekapte) woord valt weg, ook vóór een laatste regeleinde."""
+    chunker = DocumentChunker(verbose=False)
+    assert chunker._trim_to_word_boundary(text, from_start=False) == expected
@@ -0,0 +1,102 @@
+"""
+Tests voor de PDF extractie (zonder Ollama).
+
+De PDF's worden in de test zelf gemaakt met PyMuPDF.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.kwaliteitszorg.utils import pdf_processor
+from src.kwaliteitszorg.utils.pdf_processor import (
+    extract_text_from_pdf,
+    extract_texts_from_pdfs,
+)
+
+if pdf_processor.fitz is None:
+    pytest.skip("PyMuPDF niet geïnstalleerd", allow_module_level=True)
+
+
+def make_pdf(label: str, pages: int) -> bytes:
+    """Maak een PDF met `pages` pagina's tekst."""
+    doc = pdf_processor.fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        for line in range(10):
+            page.insert_text(
+                (72, 72 + 14 * line),
+                f"{label} pagina {page_num + 1} regel {line} over kwaliteitszorg.",
+                fontsize=9,
+            )
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+@pytest.fixture(autouse=True)
+def empty_result_cache():
+    """Elke test begint zonder gecachte extractieresultaten."""
+    pdf_processor._RESULT_CACHE.clear()
+    yield
+    pdf_processor._RESULT_CACHE.clear()
+
+
+def test_batch_extraction_matches_single_extraction():
+    """Parallelle extractie (spawn workers) geeft hetzelfde als losse extractie, in volgorde."""
+    files = [(make_pdf(f"doc{i}", pages=i + 1), f"doc{i}.pdf") for i in range(3)]
+
+    results = extract_texts_from_pdfs(files, max_workers=2)
+
+    assert [result.filename for result in results] == ["doc0.pdf", "doc1.pdf", "doc2.pdf"]
+    pdf_processor._RESULT_CACHE.clear()
+    for (file_bytes, filename), result in zip(files, results):
+        expected = extract_text_from_pdf(file_bytes, filename, unlimited=True)
+        assert result.success
+        assert result.text == expected.text
+        assert result.page_count == expected.page_count
+        assert result.page_boundaries == expected.page_boundaries
+
+
+def test_batch_extraction_uses_cache_and_reports_failures():
+    """Gecachte bestanden worden niet opnieuw verwerkt; een kapot bestand faalt los."""
+    cached_bytes = make_pdf("cached", pages=2)
+    cached = extract_text_from_pdf(cached_bytes, "cached.pdf", unlimited=True)
+
+    results = extract_texts_from_pdfs(
+        [(cached_bytes, "cached.pdf"), (b"geen pdf", "kapot.pdf")],
+        max_workers=2,
+    )
+
+    assert results[0].success
+    assert results[0].text == cached.text
+    assert not results[1].success
+    assert results[1].error
+
+
+def test_cached_result_is_independent_of_returned_result():
+    """Wijzigen van de teruggegeven page_boundaries laat de cache intact."""
+    file_bytes = make_pdf("cache", pages=3)
+    first = extract_text_from_pdf(file_bytes, "cache.pdf", unlimited=True)
+    expected = list(first.page_boundaries)
+
+    first.page_boundaries.clear()
+    second = extract_text_from_pdf(file_bytes, "cache.pdf", unlimited=True)
+
+    assert second.page_boundaries == expected
+
+
+def test_extraction_and_validation_use_the_same_default_limit():
+    """Zonder expliciete limiet kapt extractie af op het maximum dat validatie meldt."""
+    file_bytes = make_pdf("lang", pages=40)
+    result = extract_text_from_pdf(file_bytes, "lang.pdf")
+    max_pages, max_chars = pdf_processor._resolve_limits(None, None, unlimited=False)
+
+    assert result.page_count <= max_pages
+    assert result.char_count <= max_chars
+    assert pdf_processor.validate_document_size(max_chars)[0]
+    assert not pdf_processor.validate_document_size(max_chars + 1)[0]
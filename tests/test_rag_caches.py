@@ -0,0 +1,336 @@
+"""
+Tests voor de RAG caches en de vector store opslag (zonder Ollama).
+
+Embeddings komen van een deterministische nep-embedder, de data staat in
+een tijdelijke map per test.
+"""
+
+import json
+import sys
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.kwaliteitszorg.rag import config
+from src.kwaliteitszorg.rag import vector_store as vector_store_module
+from src.kwaliteitszorg.rag.chunker import Chunk
+from src.kwaliteitszorg.rag.embedder import (
+    BatchEmbeddingResult,
+    EmbeddingCache,
+    EmbeddingResult,
+    OllamaEmbedder,
+)
+from src.kwaliteitszorg.rag.retriever import RAGRetriever
+from src.kwaliteitszorg.rag.vector_store import VectorStore
+
+DIMENSIONS = 32
+DOCUMENT_TEXT = "Het schoolplan beschrijft de kwaliteitszorg en het pestbeleid. " * 40
+
+
+def fake_embedding(text: str) -> np.ndarray:
+    """Bag-of-words vector: elk woord telt mee in een vaste dimensie."""
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for word in text.lower().split():
+        vector[zlib.crc32(word.encode("utf-8")) % DIMENSIONS] += 1.0
+    return vector
+
+
+class FakeEmbedder:
+    """Vervangt OllamaEmbedder in de retriever."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_text(self, text: str) -> EmbeddingResult:
+        self.calls += 1
+        embedding = fake_embedding(text)
+        return EmbeddingResult(success=True, embedding=embedding, dimensions=DIMENSIONS)
+
+    def embed_batch_iter(self, texts, window_size=None, show_progress=False):
+        embeddings = np.stack([fake_embedding(text) for text in texts])
+        yield 0, BatchEmbeddingResult(
+            success=True,
+            embeddings=embeddings,
+            total_texts=len(texts),
+            successful_count=len(texts),
+            dimensions=DIMENSIONS,
+        )
+
+
+class FailingClient:
+    """Ollama client die elke aanroep laat mislukken."""
+
+    def embeddings(self, **kwargs):
+        raise ConnectionError("geen Ollama in tests")
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(monkeypatch, tmp_path):
+    """Geen embedding cache of embedder info in de data map van de repo."""
+    monkeypatch.setattr(config, "EMBED_CACHE_ENABLED", False)
+    monkeypatch.setattr(config, "EMBEDDER_INFO_PATH", tmp_path / "embedder_info.json")
+    monkeypatch.setattr(config, "SEMANTIC_CACHE_ENABLED", True)
+    yield
+    # Gedeelde store instanties niet laten lekken naar andere tests
+    vector_store_module._STORES.clear()
+
+
+def make_retriever(path: Path) -> RAGRetriever:
+    retriever = RAGRetriever(persist_path=str(path), verbose=False)
+    retriever.embedder = FakeEmbedder()
+    return retriever
+
+
+def make_chunks(document_id: str, count: int):
+    return [
+        Chunk(
+            chunk_id=f"{document_id}_{i}",
+            document_id=document_id,
+            text=f"{document_id} tekst {i}",
+            document_name=f"{document_id}.pdf",
+            chunk_index=i,
+            total_chunks=count,
+        )
+        for i in range(count)
+    ]
+
+
+def test_delete_via_other_retriever_invalidates_caches(tmp_path):
+    """Een document verwijderd via retriever A verdwijnt ook uit de caches van B."""
+    retriever_a = make_retriever(tmp_path)
+    retriever_b = make_retriever(tmp_path)
+    assert retriever_a.vector_store is retriever_b.vector_store
+
+    assert retriever_a.index_text(DOCUMENT_TEXT, "plan.pdf", document_id="plan").success
+
+    query = "kwaliteitszorg schoolplan pestbeleid"
+    assert retriever_b.get_context_for_llm(query)
+    assert retriever_b.retrieve(query, min_similarity=0.0).chunks
+    calls = retriever_b.embedder.calls
+    assert retriever_b.get_context_for_llm(query)
+    assert retriever_b.embedder.calls == calls  # context cache hit
+
+    assert retriever_a.delete_document("plan")
+
+    assert retriever_b.get_context_for_llm(query) == ""
+    assert retriever_b.retrieve(query, min_similarity=0.0).chunks == []
+
+
+def test_store_reloads_changes_from_other_instance(tmp_path):
+    """Een wijziging door een andere instantie (ander proces) wordt herladen."""
+    store = VectorStore(persist_path=str(tmp_path), verbose=False)
+    generation = store.get_generation()
+
+    # Een tweede instantie op dezelfde bestanden, zoals in een ander proces
+    del vector_store_module._STORES[(str(tmp_path.resolve()), config.COLLECTION_NAME)]
+    other = VectorStore(persist_path=str(tmp_path), verbose=False)
+    assert other is not store
+    chunks = make_chunks("extern", 3)
+    assert other.add_chunks(chunks, np.stack([fake_embedding(c.text) for c in chunks]))
+
+    assert store.get_generation() != generation
+    assert [doc["document_id"] for doc in store.list_documents()] == ["extern"]
+
+    # Toevoegen na herladen overschrijft de wijziging van de ander niet
+    chunks = make_chunks("eigen", 2)
+    assert store.add_chunks(chunks, np.stack([fake_embedding(c.text) for c in chunks]))
+    other.get_generation()  # herlaadt als de bestanden gewijzigd zijn
+    assert other.get_stats()["total_chunks"] == 5
+
+
+def stream_windows(chunks, window_size: int, on_window=None):
+    """(start, embeddings) per window, zoals OllamaEmbedder.embed_batch_iter levert."""
+    for start in range(0, len(chunks), window_size):
+        if on_window is not None:
+            on_window(start)
+        window = chunks[start:start + window_size]
+        yield start, np.stack([fake_embedding(c.text) * 2.0 for c in window])
+
+
+def test_streaming_writes_windows_into_reserved_capacity(tmp_path):
+    """Windows komen genormaliseerd in de buffer van de store; lezers zien ze pas na afloop."""
+    store = VectorStore(persist_path=str(tmp_path), verbose=False)
+    chunks = make_chunks("stream", 10)
+    buffers = []
+
+    def on_window(start):
+        # Tijdens de stream: niets zichtbaar, en lezen blokkeert niet
+        assert store.get_stats()["total_chunks"] == 0
+        buffers.append(store._buffer)
+
+    assert store.add_chunks_streaming(chunks, stream_windows(chunks, 3, on_window))
+
+    assert buffers[0] is None
+    assert all(buffer is store._buffer for buffer in buffers[1:])
+    assert store._embeddings.base is store._buffer
+    np.testing.assert_allclose(np.linalg.norm(store._embeddings, axis=1), 1.0, rtol=1e-6)
+    result = store.query(fake_embedding(chunks[7].text), top_k=1)
+    assert result.chunks[0].chunk_id == chunks[7].chunk_id
+
+
+def test_streaming_survives_reload_during_stream(tmp_path):
+    """Wijzigt een ander proces de store tijdens de stream, dan gaat geen van beide verloren."""
+    store = VectorStore(persist_path=str(tmp_path), verbose=False)
+    del vector_store_module._STORES[(str(tmp_path.resolve()), config.COLLECTION_NAME)]
+    other = VectorStore(persist_path=str(tmp_path), verbose=False)
+
+    def on_window(start):
+        if start == 3:
+            external = make_chunks("extern", 2)
+            assert other.add_chunks(external, np.stack([fake_embedding(c.text) for c in external]))
+            store.get_generation()  # een lezer herlaadt midden in de stream
+
+    chunks = make_chunks("stream", 6)
+    assert store.add_chunks_streaming(chunks, stream_windows(chunks, 3, on_window))
+
+    documents = sorted(doc["document_id"] for doc in store.list_documents())
+    assert documents == ["extern", "stream"]
+    assert store.get_stats()["total_chunks"] == 8
+    result = store.query(fake_embedding(chunks[4].text), top_k=1)
+    assert result.chunks[0].chunk_id == chunks[4].chunk_id
+
+
+def test_embedding_next_window_overlaps_with_store_write(tmp_path, monkeypatch):
+    """Window i+1 wordt al ge-embed terwijl de store window i wegschrijft."""
+    second_window_started = threading.Event()
+    overlapped = []
+
+    class WindowedEmbedder(FakeEmbedder):
+        def embed_batch_iter(self, texts, window_size=None, show_progress=False):
+            for start in range(0, len(texts), 4):
+                if start:
+                    second_window_started.set()
+                window = texts[start:start + 4]
+                yield start, BatchEmbeddingResult(
+                    success=True,
+                    embeddings=np.stack([fake_embedding(text) for text in window]),
+                    total_texts=len(window),
+                    successful_count=len(window),
+                    dimensions=DIMENSIONS,
+                )
+
+    normalize_rows = VectorStore._normalize_rows
+
+    def recording_normalize_rows(embeddings, out=None):
+        if out is not None and not overlapped:
+            # Schrijven van het eerste window: het volgende moet al onderweg zijn
+            overlapped.append(second_window_started.wait(timeout=5))
+        return normalize_rows(embeddings, out=out)
+
+    monkeypatch.setattr(VectorStore, "_normalize_rows", staticmethod(recording_normalize_rows))
+    retriever = make_retriever(tmp_path)
+    retriever.embedder = WindowedEmbedder()
+
+    result = retriever.index_text(DOCUMENT_TEXT * 4, "lang.pdf", document_id="lang")
+
+    assert result.success
+    assert result.chunks_indexed > 4
+    assert overlapped == [True]
+
+
+def test_failed_stream_leaves_store_unchanged(tmp_path):
+    """Stopt de stream halverwege, dan wordt niets toegevoegd."""
+    store = VectorStore(persist_path=str(tmp_path), verbose=False)
+    chunks = make_chunks("half", 6)
+
+    windows = stream_windows(chunks, 3)
+    assert not store.add_chunks_streaming(chunks, [next(windows)])
+    assert store.get_stats()["total_chunks"] == 0
+    assert store.list_documents() == []
+
+
+def test_legacy_store_is_migrated(tmp_path):
+    """Oude JSON metadata met ruwe embeddings wordt omgezet naar MessagePack, genormaliseerd."""
+    chunks = make_chunks("oud", 4)
+    raw = np.stack([fake_embedding(c.text) * 3.0 for c in chunks])
+    legacy = {
+        "ids": [c.chunk_id for c in chunks],
+        "texts": [c.text for c in chunks],
+        "metadata": [c.to_metadata_dict() for c in chunks],
+    }
+    collection = config.COLLECTION_NAME
+    (tmp_path / f"{collection}_data.json").write_text(json.dumps(legacy), encoding="utf-8")
+    np.save(tmp_path / f"{collection}_embeddings.npy", raw)
+
+    store = VectorStore(persist_path=str(tmp_path), verbose=False)
+
+    assert not (tmp_path / f"{collection}_data.json").exists()
+    assert (tmp_path / f"{collection}_data.msgpack").exists()
+    on_disk = np.load(tmp_path / f"{collection}_embeddings.npy")
+    np.testing.assert_allclose(np.linalg.norm(on_disk, axis=1), 1.0, rtol=1e-5)
+
+    result = store.query(fake_embedding(chunks[2].text), top_k=1)
+    assert result.success
+    assert result.chunks[0].chunk_id == chunks[2].chunk_id
+
+
+def test_float16_storage_keeps_unit_rows(tmp_path, monkeypatch):
+    """Na laden uit float16 opslag zijn de rijen weer eenheidsvectoren."""
+    monkeypatch.setattr(config, "EMBEDDING_STORAGE_DTYPE", "float16")
+    rng = np.random.default_rng(0)
+    chunks = make_chunks("half", 50)
+    store = VectorStore(persist_path=str(tmp_path), verbose=False)
+    assert store.add_chunks(chunks, rng.normal(size=(50, DIMENSIONS)).astype(np.float32))
+
+    vector_store_module._STORES.clear()
+    reloaded = VectorStore(persist_path=str(tmp_path), verbose=False)
+    np.testing.assert_allclose(np.linalg.norm(reloaded._embeddings, axis=1), 1.0, rtol=1e-6)
+
+
+def test_embedding_cache_errors_are_misses(tmp_path):
+    """SQLite fouten worden een miss of een overgeslagen put, geen exceptie."""
+    cache = EmbeddingCache(path=tmp_path / "cache.sqlite", verbose=False)
+    key = cache.make_key("model", "tekst")
+    cache.put(key, "model", [1.0, 2.0])
+    assert cache.get(key) is not None
+
+    cache._conn.close()
+    assert cache.get(key) is None
+    cache.put(cache.make_key("model", "andere tekst"), "model", [3.0])
+
+
+def test_embedding_cache_evicts_oldest_rows(tmp_path):
+    """Boven max_rows worden de oudst geschreven entries verwijderd."""
+    cache = EmbeddingCache(path=tmp_path / "cache.sqlite", max_rows=50, verbose=False)
+    for i in range(120):
+        cache.put(cache.make_key("model", f"tekst {i}"), "model", [float(i)])
+
+    count = cache._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    assert count <= 50
+    assert cache.get(cache.make_key("model", "tekst 0")) is None
+    assert cache.get(cache.make_key("model", "tekst 119"))[0] == 119.0
+
+
+def test_embed_and_embeddings_endpoints_do_not_share_keys():
+    """Het endpoint zit in de cache sleutel."""
+    assert EmbeddingCache.make_key("model", "tekst", "embed") != EmbeddingCache.make_key(
+        "model", "tekst", "embeddings"
+    )
+
+
+def test_dimensions_known_after_cache_hit(tmp_path):
+    """Ook als de test-embedding uit de cache komt zijn de dimensies bekend."""
+    cache = EmbeddingCache(path=tmp_path / "cache.sqlite", verbose=False)
+    embedder = OllamaEmbedder(model="nep-model", verbose=False, cache=cache)
+    cache.put(cache.make_key("nep-model", "test", "embeddings"), "nep-model", fake_embedding("test"))
+    embedder._client = FailingClient()
+
+    assert embedder.get_embedding_dimensions() == DIMENSIONS
+
+
+def test_embedders_share_one_embedding_cache(tmp_path, monkeypatch):
+    """Embedders (één per sessie) delen de cache voor hetzelfde bestand."""
+    monkeypatch.setattr(config, "EMBED_CACHE_ENABLED", True)
+    monkeypatch.setattr(config, "EMBED_CACHE_PATH", tmp_path / "cache.sqlite")
+
+    first = OllamaEmbedder(model="nep-model", verbose=False)
+    second = OllamaEmbedder(model="nep-model", verbose=False)
+
+    assert first.cache is not None
+    assert first.cache is second.cache